@@ -0,0 +1,192 @@
+"""Persistent two-tier cache of final answers for the RAG pipelines.
+
+Tier one matches the normalized question text exactly; tier two matches the
+question embedding by cosine similarity above a threshold. Entries expire
+after `ttl_sec` and are namespaced by collection so re-ingesting a collection
+can drop every answer built on its old contents.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return _SPACE_RE.sub(" ", (question or "").casefold()).strip().rstrip("?!. ")
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class AnswerCache:
+    """SQLite-backed answer cache with exact and semantic lookup."""
+
+    def __init__(
+        self,
+        path: str = ".answer_cache.sqlite",
+        ttl_sec: float = 24 * 3600,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 10_000,
+    ):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " namespace TEXT NOT NULL, question_key TEXT NOT NULL, question TEXT NOT NULL,"
+            " vector BLOB, answer TEXT NOT NULL, debug TEXT NOT NULL, evidence_ids TEXT NOT NULL,"
+            " created REAL NOT NULL, PRIMARY KEY (namespace, question_key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_answers_created ON answers(created)")
+        self._db.commit()
+
+    # ------------------------------ lookup --------------------------------
+
+    def get_exact(self, namespace: str, question: str) -> Optional[Dict[str, Any]]:
+        """Entry for the same normalized question, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT question, answer, debug, evidence_ids FROM answers"
+                " WHERE namespace = ? AND question_key = ? AND created >= ?",
+                (namespace, normalize_question(question), time.time() - self.ttl_sec),
+            ).fetchone()
+            if row is not None:
+                self.hits["exact"] += 1
+        if row is None:
+            return None
+        return self._entry(row, "exact", 1.0)
+
+    def get_similar(self, namespace: str, vector: List[float]) -> Optional[Dict[str, Any]]:
+        """Most similar cached question at or above the threshold, or None."""
+        query = _unit(vector)
+        with self._lock:
+            # vectors only: the text columns are read for the best match alone
+            rows = self._db.execute(
+                "SELECT rowid, vector FROM answers"
+                " WHERE namespace = ? AND created >= ? AND length(vector) = ?",
+                (namespace, time.time() - self.ttl_sec, query.nbytes),
+            ).fetchall()
+            best = None
+            if rows:
+                # one matrix-vector product over every cached question (rows are unit vectors)
+                matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32)
+                scores = matrix.reshape(len(rows), -1) @ query
+                i = int(np.argmax(scores))
+                if scores[i] >= self.similarity_threshold:
+                    best = float(scores[i]), self._db.execute(
+                        "SELECT question, answer, debug, evidence_ids FROM answers WHERE rowid = ?",
+                        (rows[i][0],),
+                    ).fetchone()
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits["semantic"] += 1
+        if best is None:
+            return None
+        return self._entry(best[1], "semantic", best[0])
+
+    @staticmethod
+    def _entry(row: tuple, tier: str, similarity: float) -> Dict[str, Any]:
+        question, answer, debug, evidence_ids = row
+        return {
+            "question": question,
+            "answer": answer,
+            "debug": json.loads(debug),
+            "evidence_ids": json.loads(evidence_ids),
+            "tier": tier,
+            "similarity": similarity,
+        }
+
+    # ------------------------------ update --------------------------------
+
+    def put(
+        self,
+        namespace: str,
+        question: str,
+        answer: str,
+        debug: Dict[str, Any],
+        evidence_ids: List[str],
+        vector: Optional[List[float]] = None,
+    ):
+        blob = _unit(vector).tobytes() if vector is not None and len(vector) else None
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers"
+                " (namespace, question_key, question, vector, answer, debug, evidence_ids, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    namespace,
+                    normalize_question(question),
+                    question,
+                    blob,
+                    answer,
+                    json.dumps(debug, default=str),
+                    json.dumps(evidence_ids),
+                    time.time(),
+                ),
+            )
+            self._db.execute("DELETE FROM answers WHERE created < ?", (time.time() - self.ttl_sec,))
+            count = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM answers WHERE rowid IN ("
+                    " SELECT rowid FROM answers ORDER BY created LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._db.commit()
+
+    def invalidate(self, namespace: str) -> int:
+        """Drop every answer of `namespace` (e.g. after re-ingestion). Returns rows removed."""
+        with self._lock:
+            removed = self._db.execute("DELETE FROM answers WHERE namespace = ?", (namespace,)).rowcount
+            self._db.commit()
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            exact, semantic, misses = self.hits["exact"], self.hits["semantic"], self.misses
+        total = exact + semantic + misses
+        return {
+            "exact_hits": exact,
+            "semantic_hits": semantic,
+            "misses": misses,
+            "hit_rate": (exact + semantic) / total if total else 0.0,
+        }
+
+
+def answer_cache_from_env() -> Optional[AnswerCache]:
+    """Cache configured by ANSWER_CACHE_PATH, or None when unset/empty (disabled)."""
+    path = os.getenv("ANSWER_CACHE_PATH", "")
+    if not path:
+        return None
+    return AnswerCache(
+        path=path,
+        ttl_sec=float(os.getenv("ANSWER_CACHE_TTL_SEC", str(24 * 3600))),
+        similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")),
+        max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000")),
+    )
+
+
+def invalidate_answer_cache(namespace: str) -> int:
+    """Drop cached answers of `namespace` if the answer cache is configured."""
+    cache = answer_cache_from_env()
+    return cache.invalidate(namespace) if cache else 0
@@ -107,7 +107,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
                 unsafe_allow_html=True,
             )
 
-    def _analyze_question(self, state):
+    async def _analyze_question(self, state):
         """Analyze question with detailed prints."""
         self.print_node("=" * 80)
         self.print_node("🔍 NODE: ANALYZE_QUESTION")
@@ -117,7 +117,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
         self.print_node(f"📝 INPUT: {question}")
         self.print_node("🧠 THINKING: Analyzing question complexity and type...")
 
-        result = super()._analyze_question(state)
+        result = await super()._analyze_question(state)
 
         self.print_node("📊 ANALYSIS COMPLETE:")
         self.print_node(
@@ -129,7 +129,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
 
         return result
 
-    def _enhanced_plan(self, state):
+    async def _enhanced_plan(self, state):
         """Enhanced planning with iteration tracking."""
         self.iteration_count += 1
 
@@ -159,7 +159,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
         self.print_node(f"📚 Current Evidence: {evidence_count} documents")
         self.print_node("🧠 THINKING: Planning retrieval strategy...")
 
-        result = super()._enhanced_plan(state)
+        result = await super()._enhanced_plan(state)
 
         sub_questions = result.get("sub_questions", [])
         self.print_node(f"🎯 PLAN: {len(sub_questions)} sub-questions generated")
@@ -167,7 +167,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
 
         return result
 
-    def _parallel_retrieve(self, state):
+    async def _parallel_retrieve(self, state):
         """Parallel retrieval with progress tracking."""
         self.print_node("=" * 80)
         self.print_node("🔍 NODE: PARALLEL_RETRIEVE")
@@ -177,7 +177,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
         self.print_node(f"🎯 EXECUTING: {len(queries)} parallel queries")
         self.print_node("🧠 THINKING: Searching multiple strategies...")
 
-        result = super()._parallel_retrieve(state)
+        result = await super()._parallel_retrieve(state)
 
         total_evidence = len(result.get("evidence_docs", []))
         new_docs = len(result.get("fused_results", []))
@@ -187,7 +187,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
 
         return result
 
-    def _advanced_assess(self, state):
+    async def _advanced_assess(self, state):
         """Assessment with quality metrics."""
         self.print_node("=" * 80)
         self.print_node("📊 NODE: ADVANCED_ASSESS")
@@ -197,7 +197,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
         self.print_node(f"📚 ASSESSING: {len(evidence_docs)} documents")
         self.print_node("🧠 THINKING: Evaluating quality and completeness...")
 
-        result = super()._advanced_assess(state)
+        result = await super()._advanced_assess(state)
 
         quality = result.get("context_quality_score", 0)
         coverage = result.get("coverage_score", 0)
@@ -207,7 +207,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
 
         return result
 
-    def _intelligent_decide(self, state):
+    async def _intelligent_decide(self, state):
         """Decision making with clear reasoning."""
         self.print_node("=" * 80)
         self.print_node("🤔 NODE: INTELLIGENT_DECIDE")
@@ -230,7 +230,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
                 "decision_factors": {"force_stop": True},
             }
 
-        result = super()._intelligent_decide(state)
+        result = await super()._intelligent_decide(state)
 
         should_stop = result.get("stop", False)
         decision = "🛑 STOP" if should_stop else "🔄 CONTINUE"
@@ -239,7 +239,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
 
         return result
 
-    def _enhanced_synthesis(self, state):
+    async def _enhanced_synthesis(self, state):
         """Synthesis with answer generation."""
         self.print_node("=" * 80)
         self.print_node("✍️ NODE: ENHANCED_SYNTHESIS")
@@ -249,7 +249,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
         self.print_node(f"📚 SYNTHESIZING: {len(evidence_docs)} sources")
         self.print_node("🧠 THINKING: Creating comprehensive answer...")
 
-        result = super()._enhanced_synthesis(state)
+        result = await super()._enhanced_synthesis(state)
 
         final_answer = result.get("final_answer", "")
         confidence = result.get("answer_confidence", 0)
@@ -261,7 +261,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
 
         return result
 
-    def _advanced_verify(self, state):
+    async def _advanced_verify(self, state):
         """Verification with final state capture."""
         self.print_node("=" * 80)
         self.print_node("✅ NODE: ADVANCED_VERIFY")
@@ -273,7 +273,7 @@ class FinalRAGPipeline(EnhancedRAGPipeline):
         self.print_node(f"🔍 VERIFYING: {len(evidence_docs)} sources")
         self.print_node("🧠 THINKING: Checking grounding...")
 
-        result = super()._advanced_verify(state)
+        result = await super()._advanced_verify(state)
 
         grounded = result.get("grounded_ok", False)
         self.print_node(f"✅ GROUNDING: {'PASSED' if grounded else 'FAILED'}")
@@ -0,0 +1,274 @@
+"""Process-wide HTTP clients for every Azure OpenAI chat and embedding client.
+
+All LangChain clients built with `azure_client_kwargs()` share one sync httpx
+connection pool, so TLS handshakes and connections are reused across
+pipelines. Async connections cannot cross event loops, so the async client
+keeps one pool per running loop, opened on its first request there. The
+pipelines' sync `ask`/`stream` all run on one background loop, so the
+Streamlit app's per-click `FinalRAGPipeline` reuses that loop's pool.
+
+Every request first takes a reservation from its deployment's token bucket
+(TPM and RPM quota), then is sent; 429/5xx responses and transport errors are
+retried with tenacity, honouring `Retry-After` / `retry-after-ms`. The SDK's
+own retries are disabled so throttling is handled in one place.
+
+    AZURE_OPENAI_RATE_LIMITS='{"gpt-4o": {"tpm": 150000, "rpm": 900}, "*": {"tpm": 350000, "rpm": 2100}}'
+    AZURE_OPENAI_MAX_CONNECTIONS=100
+    AZURE_OPENAI_MAX_RETRIES=6
+
+`client_pool_stats()` reports requests, queue wait and throttling per deployment.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+RETRY_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+MAX_RETRY_AFTER = 60.0
+_DEPLOYMENT_RE = re.compile(r"/deployments/([^/]+)/")
+
+
+class TokenBucket:
+    """Per-minute TPM/RPM quota; `reserve` debits a request and returns how long to wait."""
+
+    def __init__(self, tpm: Optional[int] = None, rpm: Optional[int] = None):
+        self.capacity = {"tokens": tpm, "requests": rpm}
+        self.level = {k: float(v) for k, v in self.capacity.items() if v}
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        cost = {"tokens": tokens, "requests": 1}
+        with self._lock:
+            now = time.monotonic()
+            elapsed, self.updated = now - self.updated, now
+            wait = 0.0
+            for key, level in self.level.items():
+                capacity = self.capacity[key]
+                rate = capacity / 60.0
+                # the balance may go negative: later callers queue behind this reservation
+                level = min(capacity, level + elapsed * rate) - min(cost[key], capacity)
+                self.level[key] = level
+                wait = max(wait, -level / rate)
+            return wait
+
+
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, deployment: str, **values: float):
+        with self._lock:
+            stats = self._stats.setdefault(
+                deployment,
+                {"requests": 0, "tokens": 0, "queued": 0, "wait_s": 0.0, "max_wait_s": 0.0, "throttled": 0, "retries": 0},
+            )
+            for key, value in values.items():
+                if key == "max_wait_s":
+                    stats[key] = max(stats[key], value)
+                else:
+                    stats[key] += value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {**s, "avg_wait_s": s["wait_s"] / s["requests"] if s["requests"] else 0.0}
+                for name, s in self._stats.items()
+            }
+
+
+def _estimate_tokens(request: httpx.Request) -> int:
+    """Rough prompt tokens (~4 chars each) plus max_tokens, the way Azure meters TPM up front."""
+    try:
+        payload = json.loads(request.content or b"{}")
+    except ValueError:
+        return 1
+    if not isinstance(payload, dict):
+        return 1
+    prompt = payload.get("messages") or payload.get("input") or ""
+    return len(json.dumps(prompt)) // 4 + int(payload.get("max_tokens") or 0)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class _RetryAfterWait:
+    """tenacity wait: the server's Retry-After when given, else exponential backoff with jitter."""
+
+    def __init__(self):
+        self.backoff = wait_exponential_jitter(initial=1, max=30)
+
+    def __call__(self, retry_state) -> float:
+        outcome = retry_state.outcome
+        if outcome is not None and not outcome.failed:
+            delay = _retry_after(outcome.result())
+            if delay is not None:
+                return min(delay, MAX_RETRY_AFTER)
+        return self.backoff(retry_state)
+
+
+class _RateLimitedTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Wraps the pooled transports with the token buckets and Retry-After retries."""
+
+    def __init__(self, pool: "ClientPool", limits: httpx.Limits):
+        self.pool = pool
+        self.limits = limits
+        self.sync_transport = httpx.HTTPTransport(limits=limits)
+        self._async_transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _async_transport(self) -> httpx.AsyncHTTPTransport:
+        """Connection pool of the running event loop, created on its first request."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._async_transports.get(loop)
+            if transport is None:
+                transport = self._async_transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+            return transport
+
+    def _retry_kwargs(self, deployment: str) -> Dict[str, Any]:
+        return {
+            "retry": retry_if_result(lambda r: r.status_code in RETRY_STATUS)
+            | retry_if_exception_type(httpx.TransportError),
+            "wait": _RetryAfterWait(),
+            "stop": stop_after_attempt(self.pool.max_retries + 1),
+            "before_sleep": lambda _: self.pool.metrics.record(deployment, retries=1),
+            # out of attempts: hand the last response (or error) to the SDK
+            "retry_error_callback": lambda state: state.outcome.result(),
+        }
+
+    def _admit(self, request: httpx.Request, deployment: str) -> float:
+        tokens = _estimate_tokens(request)
+        wait = self.pool.bucket(deployment).reserve(tokens)
+        self.pool.metrics.record(
+            deployment, requests=1, tokens=tokens, queued=int(wait > 0), wait_s=wait, max_wait_s=wait
+        )
+        return wait
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        deployment = _deployment(request)
+
+        def send() -> httpx.Response:
+            wait = self._admit(request, deployment)
+            if wait:
+                time.sleep(wait)
+            response = self.sync_transport.handle_request(request)
+            if response.status_code in RETRY_STATUS:
+                self.pool.metrics.record(deployment, throttled=int(response.status_code == 429))
+                response.read()  # release the connection before waiting
+            return response
+
+        return Retrying(**self._retry_kwargs(deployment))(send)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        deployment = _deployment(request)
+
+        async def send() -> httpx.Response:
+            wait = self._admit(request, deployment)
+            if wait:
+                await asyncio.sleep(wait)
+            response = await self._async_transport().handle_async_request(request)
+            if response.status_code in RETRY_STATUS:
+                self.pool.metrics.record(deployment, throttled=int(response.status_code == 429))
+                await response.aread()
+            return response
+
+        return await AsyncRetrying(**self._retry_kwargs(deployment))(send)
+
+    def close(self):
+        self.sync_transport.close()
+
+    async def aclose(self):
+        with self._lock:
+            transport = self._async_transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def _deployment(request: httpx.Request) -> str:
+    match = _DEPLOYMENT_RE.search(request.url.path)
+    return match.group(1) if match else request.url.host
+
+
+class ClientPool:
+    """Shared httpx clients (async pools per event loop) plus per-deployment token buckets and metrics."""
+
+    def __init__(
+        self,
+        rate_limits: Optional[Dict[str, Dict[str, int]]] = None,
+        max_connections: int = 100,
+        max_retries: int = 6,
+    ):
+        self.rate_limits = rate_limits or {}
+        self.max_retries = max_retries
+        self.metrics = _Metrics()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        transport = _RateLimitedTransport(self, limits)
+        self.http_client = httpx.Client(transport=transport, timeout=None)
+        self.http_async_client = httpx.AsyncClient(transport=transport, timeout=None)
+
+    def bucket(self, deployment: str) -> TokenBucket:
+        with self._lock:
+            if deployment not in self._buckets:
+                quota = self.rate_limits.get(deployment) or self.rate_limits.get("*") or {}
+                self._buckets[deployment] = TokenBucket(quota.get("tpm"), quota.get("rpm"))
+            return self._buckets[deployment]
+
+
+_pool: Optional[ClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def client_pool() -> ClientPool:
+    """The process-wide pool, configured from the environment on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ClientPool(
+                rate_limits=json.loads(os.getenv("AZURE_OPENAI_RATE_LIMITS") or "{}"),
+                max_connections=int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "100")),
+                max_retries=int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "6")),
+            )
+        return _pool
+
+
+def azure_client_kwargs() -> Dict[str, Any]:
+    """Keyword arguments for AzureChatOpenAI / AzureOpenAIEmbeddings to use the shared pool."""
+    pool = client_pool()
+    return {"http_client": pool.http_client, "http_async_client": pool.http_async_client, "max_retries": 0}
+
+
+def client_pool_stats() -> Dict[str, Dict[str, float]]:
+    """Per-deployment requests, estimated tokens, queue wait and throttling counters."""
+    return client_pool().metrics.snapshot()
@@ -0,0 +1,195 @@
+"""On-disk BM25 index for the "keyword" retrieval strategy.
+
+Built at ingestion time from the same chunk stream that is embedded, and
+stored per collection as flat numpy arrays that are memory-mapped at load
+(one generation directory per rebuild, see `versioned_dir`):
+
+    meta.json         collection, doc count, k1/b
+    vocab.json        term -> term id
+    idf.npy           float32 idf per term id
+    offsets.npy       int64 postings offset per term id (+1 sentinel)
+    postings_doc.npy  uint32 doc index per posting, grouped by term
+    postings_w.npy    float32 BM25 term-frequency weight per posting
+    docs.jsonl        one {"id", "text", "metadata"} record per chunk
+    doc_offsets.npy   int64 byte offset of each docs.jsonl line (+1 sentinel)
+
+A query only touches the postings of its own terms, so it costs a few array
+slices instead of an embedding request plus an ANN search.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
+from langchain_core.documents import Document
+
+from versioned_dir import current_dir, publish
+
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it of on or that the this to was were what which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords ("Field 46A" -> ["field", "46a"])."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def index_dir_for(collection: str, root: Optional[str] = None) -> Optional[Path]:
+    """Directory of `collection`'s index under BM25_INDEX_DIR (None when disabled)."""
+    root = os.getenv("BM25_INDEX_DIR", ".bm25_index") if root is None else root
+    return Path(root) / collection if root else None
+
+
+class BM25Index:
+    """Read-only, memory-mapped BM25 index."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(self.path / "vocab.json", encoding="utf-8") as f:
+            self.vocab: Dict[str, int] = json.load(f)
+        load = lambda name: np.load(self.path / name, mmap_mode="r")
+        self.idf = load("idf.npy")
+        self.offsets = load("offsets.npy")
+        self.postings_doc = load("postings_doc.npy")
+        self.postings_w = load("postings_w.npy")
+        self.doc_offsets = load("doc_offsets.npy")
+        self.n_docs = int(self.meta["n_docs"])
+        self._docs_file = open(self.path / "docs.jsonl", "rb")
+        self._docs = mmap.mmap(self._docs_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def load(cls, collection: str, root: Optional[str] = None) -> Optional["BM25Index"]:
+        """Index of `collection`, or None if it is disabled, not built or empty."""
+        path = current_dir(index_dir_for(collection, root))
+        if path is None or not (path / "meta.json").exists():
+            return None
+        with open(path / "meta.json", encoding="utf-8") as f:
+            if not json.load(f).get("n_docs"):
+                return None
+        return cls(path)
+
+    def _doc(self, i: int) -> Document:
+        record = json.loads(self._docs[int(self.doc_offsets[i]):int(self.doc_offsets[i + 1])])
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def search_with_score(self, query: str, k: int = 8) -> List[Tuple[Document, float]]:
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            start, end = int(self.offsets[t]), int(self.offsets[t + 1])
+            # each doc appears at most once per term, so fancy-index += is safe
+            scores[self.postings_doc[start:end]] += self.idf[t] * self.postings_w[start:end]
+
+        hits = np.flatnonzero(scores)
+        if hits.size > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self._doc(i), float(scores[i])) for i in hits]
+
+    def search(self, query: str, k: int = 8) -> List[Document]:
+        return [doc for doc, _ in self.search_with_score(query, k)]
+
+
+class BM25IndexWriter:
+    """
+    Incrementally maintained corpus for one collection; `commit` rewrites the index.
+    Chunks are keyed by their `chunk_id` metadata, so re-adding a chunk replaces it.
+    """
+
+    def __init__(self, collection: str, root: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.collection = collection
+        self.path = index_dir_for(collection, root)
+        self.k1 = k1
+        self.b = b
+        self.records: Dict[str, Dict[str, Any]] = {}
+        current = current_dir(self.path)
+        if current is not None and (current / "docs.jsonl").exists():
+            with open(current / "docs.jsonl", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.records[record["id"]] = record
+
+    def is_empty(self) -> bool:
+        return not self.records
+
+    def add(self, docs: Iterable[Document]):
+        for doc in docs:
+            cid = doc.metadata.get("chunk_id") or str(uuid4())
+            self.records[cid] = {"id": cid, "text": doc.page_content, "metadata": doc.metadata}
+
+    def remove(self, ids: Iterable[str]):
+        for cid in ids:
+            self.records.pop(cid, None)
+
+    def commit(self):
+        """Tokenize the corpus and publish it as a new index generation."""
+        records = list(self.records.values())
+
+        vocab: Dict[str, int] = {}
+        terms, docs, tfs = [], [], []
+        lengths = np.zeros(len(records), dtype=np.float32)
+        for i, record in enumerate(records):
+            counts = Counter(tokenize(record["text"]))
+            lengths[i] = sum(counts.values())
+            for term, tf in counts.items():
+                terms.append(vocab.setdefault(term, len(vocab)))
+                docs.append(i)
+                tfs.append(tf)
+
+        terms = np.asarray(terms, dtype=np.int64)
+        docs = np.asarray(docs, dtype=np.uint32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+        order = np.argsort(terms, kind="stable")
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+
+        df = np.bincount(terms, minlength=len(vocab))
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(df)
+        n = len(records)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(lengths.mean()) if n else 0.0
+        norm = self.k1 * (1 - self.b + self.b * lengths[docs] / (avgdl or 1.0))
+        weights = (tfs * (self.k1 + 1) / (tfs + norm)).astype(np.float32)
+
+        lines = [
+            (json.dumps(r, ensure_ascii=False, default=str) + "\n").encode("utf-8") for r in records
+        ]
+        doc_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(line) for line in lines], out=doc_offsets[1:])
+
+        meta = {"collection": self.collection, "n_docs": n, "avgdl": avgdl, "k1": self.k1, "b": self.b}
+
+        def fill(directory: Path):
+            with open(directory / "docs.jsonl", "wb") as f:
+                f.writelines(lines)
+            np.save(directory / "doc_offsets.npy", doc_offsets)
+            np.save(directory / "postings_doc.npy", docs)
+            np.save(directory / "postings_w.npy", weights)
+            np.save(directory / "offsets.npy", offsets)
+            np.save(directory / "idf.npy", idf)
+            (directory / "vocab.json").write_text(json.dumps(vocab), encoding="utf-8")
+            (directory / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+        # readers switch to the new generation only once every file is complete
+        publish(self.path, fill)
+
+
+def bm25_writer_from_env(collection: str) -> Optional[BM25IndexWriter]:
+    """Writer for BM25_INDEX_DIR (default ".bm25_index"; empty disables)."""
+    if index_dir_for(collection) is None:
+        return None
+    return BM25IndexWriter(collection)
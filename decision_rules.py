@@ -0,0 +1,105 @@
+"""Deterministic fast paths for question analysis and stop decisions.
+
+Both functions return the same JSON shape the LLM prompts produce
+(QUESTION_ANALYSIS_PROMPT / DECISION_MAKING_PROMPT), or None when the case is
+ambiguous and the LLM should decide.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+# Thresholds spelled out in DECISION_MAKING_PROMPT
+STOP_QUALITY = 0.85
+STOP_COVERAGE = 0.9
+MIN_IMPROVEMENT = 0.05
+# Below these scores, with retrieval still improving, continuing is clear-cut
+CONTINUE_QUALITY = 0.6
+CONTINUE_COVERAGE = 0.6
+
+_COMPARATIVE_RE = re.compile(r"\b(compare\w*|versus|vs\.?|differ\w*|contrast\w*|between)\b", re.I)
+_ANALYTICAL_RE = re.compile(
+    r"\b(why|how|explain\w*|analy[sz]\w*|assess\w*|evaluat\w*|impact\w*|implication\w*|discrepanc\w*)\b", re.I
+)
+_FACTUAL_RE = re.compile(r"^\s*(what|which|who|when|where|define|list|name)\b", re.I)
+# Trade-finance style identifiers: "MT700", "UCP 600", "Article 14(c)", "field 46A"
+_IDENTIFIER_RE = re.compile(
+    r"\b(?:[A-Z]{2,}\s?\d+[A-Z]?|article\s+\d+(?:\(\w\))?|field\s+\d+[A-Z]?)", re.I
+)
+
+
+def estimate_complexity(question: str) -> Optional[Dict[str, Any]]:
+    """Cheap question analysis from surface features; None for ambiguous questions."""
+    words = question.split()
+    comparative = bool(_COMPARATIVE_RE.search(question))
+    analytical = bool(_ANALYTICAL_RE.search(question))
+    factual = bool(_FACTUAL_RE.search(question)) and not (comparative or analytical)
+
+    # Long, multi-part, mixed-type or discrepancy questions go to the LLM
+    if len(words) > 40 or question.count("?") > 1 or (comparative and analytical):
+        return None
+    if re.search(r"discrepanc", question, re.I):
+        return None
+    if not (comparative or analytical or factual):
+        return None
+
+    identifiers = list(dict.fromkeys(m.group(0).strip() for m in _IDENTIFIER_RE.finditer(question)))
+    clauses = 1 + len(re.findall(r"\band\b|;|,", question, re.I))
+
+    if comparative:
+        question_type, complexity, hops = "comparative", 7.0, 4
+    elif analytical:
+        question_type, complexity, hops = "analytical", 5.0, 3
+    else:
+        question_type, complexity, hops = "factual", 2.5, 2
+
+    complexity += 0.5 * min(clauses - 1, 3) + (1.0 if len(words) > 25 else 0.0)
+    hops += min(max(len(identifiers) - 1, 0), 2)
+    evidence_types = ["documents", "comparisons"] if comparative else ["documents"]
+
+    return {
+        "complexity_score": min(complexity, 10.0),
+        "question_type": question_type,
+        "estimated_hops": hops,
+        "required_evidence_types": evidence_types,
+        "key_aspects": identifiers or ["general"],
+        "reasoning": f"Heuristic: {question_type}, {len(words)} words, {clauses} clause(s)",
+    }
+
+
+def rule_based_decision(
+    quality: float,
+    coverage: float,
+    improvements: List[float],
+    iteration: int,
+    max_iters: int,
+    min_iters: int,
+    new_evidence: int,
+) -> Optional[Dict[str, Any]]:
+    """Apply the numeric stop/continue rules for hop `iteration + 1`; None when ambiguous."""
+    hop = iteration + 1
+
+    def decide(decision: str, reason: str) -> Dict[str, Any]:
+        return {
+            "decision": decision,
+            "confidence": 1.0,
+            "reasoning": f"Rule: {reason}",
+            "stop_reasons": [reason] if decision == "stop" else [],
+            "continue_strategy": "close remaining information gaps" if decision == "continue" else "",
+            "estimated_remaining_hops": 0 if decision == "stop" else max(1, max_iters - hop),
+        }
+
+    if hop >= max_iters:
+        return decide("stop", "Reached maximum iterations")
+    if hop < min_iters:
+        return decide("continue", "Below minimum hops")
+    if quality > STOP_QUALITY and coverage > STOP_COVERAGE:
+        return decide("stop", f"Quality > {STOP_QUALITY} and coverage > {STOP_COVERAGE}")
+    if len(improvements) >= 2 and all(i < MIN_IMPROVEMENT for i in improvements[-2:]):
+        return decide("stop", f"Quality improvement < {MIN_IMPROVEMENT} for last 2 hops")
+    if not new_evidence and improvements and improvements[-1] < MIN_IMPROVEMENT:
+        return decide("stop", "No new relevant information in last hop")
+    if (quality < CONTINUE_QUALITY or coverage < CONTINUE_COVERAGE) and (
+        not improvements or improvements[-1] >= MIN_IMPROVEMENT
+    ):
+        return decide("continue", "Quality/coverage below thresholds and still improving")
+    return None
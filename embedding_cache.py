@@ -0,0 +1,142 @@
+"""Persistent on-disk embedding cache shared by ingestion and the RAG pipelines.
+
+Vectors are stored as float32 blobs in SQLite, keyed by sha256(deployment + text),
+with LRU eviction once `max_entries` is exceeded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an `Embeddings` object with a persistent float32 cache."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        namespace: str,
+        path: str = ".embedding_cache.sqlite",
+        max_entries: int = 500_000,
+    ):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_last_used ON embeddings(last_used)")
+        self._db.commit()
+
+    # ------------------------------ cache ---------------------------------
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):  # stay under SQLite's variable limit
+                part = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                )
+                self._db.commit()
+        return found
+
+    def _store(self, items: Dict[str, List[float]]):
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(k, array("f", v).tobytes(), now) for k, v in items.items()],
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._db.commit()
+
+    def _split(self, texts: List[str]):
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in found))
+        with self._lock:
+            self.hits += len(texts) - sum(1 for k in keys if k not in found)
+            self.misses += len(missing)
+        return keys, found, missing
+
+    def _merge(self, keys, found, missing, vectors) -> List[List[float]]:
+        fresh = {self._key(t): v for t, v in zip(missing, vectors)}
+        if fresh:
+            self._store(fresh)
+        found.update(fresh)
+        return [found[k] for k in keys]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # --------------------------- Embeddings API ---------------------------
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(texts)
+        vectors = self.embeddings.embed_documents(missing) if missing else []
+        return self._merge(keys, found, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._split([text])
+        vectors = [self.embeddings.embed_query(text)] if missing else []
+        return self._merge(keys, found, missing, vectors)[0]
+
+    # SQLite reads/writes run in a thread so they never block the event loop
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = await asyncio.to_thread(self._split, texts)
+        vectors = await self.embeddings.aembed_documents(missing) if missing else []
+        return await asyncio.to_thread(self._merge, keys, found, missing, vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = await asyncio.to_thread(self._split, [text])
+        vectors = [await self.embeddings.aembed_query(text)] if missing else []
+        return (await asyncio.to_thread(self._merge, keys, found, missing, vectors))[0]
+
+
+def cached_embeddings(embeddings: Embeddings, namespace: str) -> Embeddings:
+    """Wrap `embeddings` with the cache configured by EMBEDDING_CACHE_PATH (empty disables)."""
+    path = os.getenv("EMBEDDING_CACHE_PATH", ".embedding_cache.sqlite")
+    if not path:
+        return embeddings
+    max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+    return CachedEmbeddings(embeddings, namespace, path=path, max_entries=max_entries)
@@ -0,0 +1,103 @@
+"""Batched, concurrent embedding + insert engine shared by the ingestion scripts."""
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+from uuid import uuid4
+
+from tqdm import tqdm
+from langchain_core.documents import Document
+
+
+def _batched(docs: Iterable[Document], size: int) -> Iterator[List[Document]]:
+    it = iter(docs)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+class BatchIngestor:
+    """
+    Embed and insert chunks in batches instead of one request per chunk:
+      1) chunks are grouped into batches of `batch_size` (one embedding request each)
+      2) up to `max_workers` embedding requests are in flight at once
+      3) a single writer thread inserts finished batches while later ones embed
+    Works with any vector store exposing `add_embeddings` (PGVector, Neo4jVector).
+    """
+
+    def __init__(
+        self,
+        vectorstore,
+        embeddings,
+        batch_size: int = 64,
+        max_workers: int = 4,
+        desc: str = "Embedding & inserting",
+    ):
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.batch_size = max(1, int(batch_size))
+        self.max_workers = max(1, int(max_workers))
+        self.desc = desc
+        self.inserted = 0
+        self.elapsed = 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.inserted / self.elapsed if self.elapsed > 0 else 0.0
+
+    def _embed(self, batch: List[Document]) -> List[List[float]]:
+        return self.embeddings.embed_documents([d.page_content for d in batch])
+
+    def _insert(self, batch: List[Document], vectors: List[List[float]]) -> List[str]:
+        ids = [d.metadata.get("chunk_id") or str(uuid4()) for d in batch]
+        return self.vectorstore.add_embeddings(
+            texts=[d.page_content for d in batch],
+            embeddings=vectors,
+            metadatas=[d.metadata for d in batch],
+            ids=ids,
+        )
+
+    def run(self, docs: Iterable[Document], total: Optional[int] = None) -> List[str]:
+        """Embed and insert `docs` (any iterable, consumed lazily); returns inserted ids."""
+        ids: List[str] = []
+        embedding = deque()  # (batch, embed future) in submission order
+        writing = deque()    # (batch size, insert future) in submission order
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="embed") as embed_pool, \
+                ThreadPoolExecutor(1, thread_name_prefix="insert") as write_pool, \
+                tqdm(total=total, desc=self.desc, unit="chunk") as pbar:
+
+            def collect(block: bool):
+                # pop finished inserts (oldest first) and report throughput
+                while writing and (block or writing[0][1].done()):
+                    n, fut = writing.popleft()
+                    ids.extend(fut.result())
+                    self.inserted += n
+                    self.elapsed = time.perf_counter() - start
+                    pbar.update(n)
+                    pbar.set_postfix({"chunks/s": f"{self.chunks_per_sec:.1f}"})
+
+            def hand_off():
+                # wait for the oldest embedding and queue its insert
+                batch, fut = embedding.popleft()
+                writing.append((len(batch), write_pool.submit(self._insert, batch, fut.result())))
+                if len(writing) > self.max_workers:
+                    writing[0][1].result()  # back-pressure on a slow database
+                collect(block=False)
+
+            for batch in _batched(docs, self.batch_size):
+                embedding.append((batch, embed_pool.submit(self._embed, batch)))
+                if len(embedding) >= self.max_workers:
+                    hand_off()
+
+            while embedding:
+                hand_off()
+            collect(block=True)
+
+        self.elapsed = time.perf_counter() - start
+        return ids
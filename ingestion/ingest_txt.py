@@ -1,14 +1,22 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
-from tqdm import tqdm
-import time
 
 from langchain_openai import AzureOpenAIEmbeddings
 from langchain_postgres import PGVector
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import TextLoader
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from answer_cache import invalidate_answer_cache
+from azure_clients import azure_client_kwargs, client_pool_stats
+from embedding_cache import cached_embeddings
+from ingestion.batch_ingest import BatchIngestor
+from ingestion.local_indexes import LocalIndexes, pgvector_vectors
+from ingestion.manifest import IngestManifest, manifest_path_for, purge_unmanaged_pgvector
+from pgvector_index import ensure_index_from_env
+
 
 def get_env(name: str, required=True, default=None):
     v = os.getenv(name, default)
@@ -17,12 +25,8 @@ def get_env(name: str, required=True, default=None):
     return v
 
 
-def load_txts(docs_dir: str):
-    docs = []
-    for txt_path in Path(docs_dir).glob("**/*.txt"):
-        loader = TextLoader(str(txt_path), encoding='utf-8')
-        docs.extend(loader.load())
-    return docs
+def find_txts(docs_dir: str):
+    return sorted(Path(docs_dir).glob("**/*.txt"))
 
 
 def main():
@@ -34,11 +38,9 @@ def main():
     api_version = get_env("AZURE_OPENAI_API_VERSION")
     emb_deployment = get_env("AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT")
     collections = get_env("COLLECTION_NAME")
-
-
-    print(f"Loading TXT files from: {docs_dir}")
-    raw_docs = load_txts(docs_dir)
-    print(f"Loaded {len(raw_docs)} documents")
+    batch_size = int(get_env("INGEST_BATCH_SIZE", required=False, default="64"))
+    max_workers = int(get_env("INGEST_MAX_WORKERS", required=False, default="4"))
+    manifest_path = get_env("INGEST_MANIFEST", required=False, default=manifest_path_for(collections, "txt"))
 
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
@@ -46,15 +48,15 @@ def main():
         length_function=len,
         separators=["\n\n", "\n", " ", ""],
     )
-    docs = splitter.split_documents(raw_docs)
-    print(f"Split into {len(docs)} chunks")
 
     embeddings = AzureOpenAIEmbeddings(
         azure_endpoint=endpoint,
         api_key=api_key,
         api_version=api_version,
         deployment=emb_deployment,   # your embeddings deployment name
+        **azure_client_kwargs(),
     )
+    embeddings = cached_embeddings(embeddings, emb_deployment)
 
     # Create (or connect to) a PGVector collection/table
     vectorstore = PGVector(
@@ -64,18 +66,55 @@ def main():
         use_jsonb=True,                # store metadata as JSONB
     )
 
-    # Upsert docs with tqdm progress bar
-    uuids = []
-    with tqdm(total=len(docs), desc="Embedding & inserting", unit="chunk") as pbar:
-        for doc in docs:
-            start_time = time.time()
-            ids = vectorstore.add_documents([doc])
-            uuids.extend(ids)
-            elapsed = time.time() - start_time
-            pbar.set_postfix({"last_time_sec": f"{elapsed:.2f}"})
-            pbar.update(1)
-
-    print(f"✅ Upserted {len(uuids)} vectors")
+    print(f"Loading TXT files from: {docs_dir}")
+    txts = find_txts(docs_dir)
+
+    # Only new/changed files are loaded; vectors of deleted files are removed
+    manifest = IngestManifest(manifest_path, collections, legacy_path=f".ingest_manifest/{collections}.json")
+    changed, removed_ids = manifest.plan(txts, root=docs_dir, pattern="*.txt")
+    print(f"{len(changed)} new/changed file(s), {len(txts) - len(changed)} unchanged")
+    if removed_ids:
+        vectorstore.delete(ids=removed_ids)
+        print(f"Removed {len(removed_ids)} vectors of deleted files")
+    # rows ingested before the manifest have random ids; drop them before re-inserting
+    purged = purge_unmanaged_pgvector(db_url, collections, manifest.unrecorded(changed))
+    if purged:
+        print(f"Replaced {purged} vectors ingested before the manifest")
+
+    # BM25 index and mmap vector export, kept in sync with the vector store
+    local_indexes = LocalIndexes(collections, embeddings, pgvector_vectors(db_url, collections))
+    changed = local_indexes.plan(changed, txts, removed_ids, manifest)
+
+    def chunks():
+        for path in changed:
+            raw_docs = TextLoader(path, encoding='utf-8').load()
+            split_docs = splitter.split_documents(raw_docs)
+            todo, stale_ids = manifest.update(path, split_docs)
+            if stale_ids:
+                vectorstore.delete(ids=stale_ids)
+            local_indexes.update(split_docs, stale_ids)
+            yield from todo
+
+    # Batched, concurrent embed + insert with tqdm progress bar
+    ingestor = BatchIngestor(vectorstore, embeddings, batch_size=batch_size, max_workers=max_workers)
+    uuids = ingestor.run(chunks())
+    manifest.save()
+    if changed or removed_ids:
+        local_indexes.commit()
+    # ANN index (PGVECTOR_INDEX): built once, then kept or rebuilt as the collection grows
+    ann_index = ensure_index_from_env(db_url, collections)
+    if ann_index is not None:
+        print(f"ANN index: {ann_index['method']} on {ann_index['type']}({ann_index['dims']}) {ann_index['params']}")
+    if changed or removed_ids:
+        # cached answers were built on the old contents of this collection
+        dropped = invalidate_answer_cache(collections)
+        if dropped:
+            print(f"Invalidated {dropped} cached answer(s)")
+    if hasattr(embeddings, "stats"):
+        print(f"Embedding cache: {embeddings.stats()}")
+    print(f"Azure OpenAI requests: {client_pool_stats()}")
+
+    print(f"✅ Upserted {len(uuids)} vectors in {ingestor.elapsed:.1f}s ({ingestor.chunks_per_sec:.1f} chunks/s)")
 
 
 if __name__ == "__main__":
@@ -1,13 +1,20 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
-from tqdm import tqdm
-import time
 
 from langchain_openai import AzureOpenAIEmbeddings
 from langchain_neo4j import Neo4jVector
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader, PDFMinerLoader
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from answer_cache import invalidate_answer_cache
+from azure_clients import azure_client_kwargs, client_pool_stats
+from embedding_cache import cached_embeddings
+from ingestion.batch_ingest import BatchIngestor
+from ingestion.local_indexes import LocalIndexes, neo4j_vectors
+from ingestion.manifest import IngestManifest, manifest_path_for, purge_unmanaged_neo4j
+from ingestion.pdf_loader import find_pdfs, iter_pdfs
 
 # ---------- helpers ----------
 
@@ -19,70 +26,6 @@ def get_env(name: str, required=True, default=None):
     return v
 
 
-def _try_loader(loader_cls, path, **kwargs):
-    try:
-        return loader_cls(path, **kwargs).load()
-    except Exception as e:
-        print(f"[{loader_cls.__name__}] {os.path.basename(path)}: {e}")
-        return []
-
-
-def _sanitize_pdf(path: str) -> str:
-    """Rewrite/repair a problematic PDF via pikepdf/QPDF; returns repaired path or original."""
-    try:
-        import pikepdf
-
-        os.makedirs(".tmp_sanitized", exist_ok=True)
-        out_path = os.path.join(".tmp_sanitized", os.path.basename(path))
-        with pikepdf.open(path) as pdf:
-            # linearize & clean objects; helps with bad resource refs/xrefs
-            pdf.save(out_path, linearize=True)
-        return out_path
-    except Exception as e:
-        print(f"[pikepdf] couldn't sanitize {os.path.basename(path)}: {e}")
-        return path
-
-
-def load_pdfs(docs_dir: str, default_password_env: str = "PDF_PASSWORD"):
-    """
-    Load PDFs with a tolerant fallback chain:
-      1) PyPDFLoader (fast; supports passwords)
-      2) PDFMinerLoader (robust text extractor)
-      3) Sanitize via pikepdf, then retry 1) and 2)
-    """
-    docs = []
-    pw = os.getenv(default_password_env, "") or None
-    pdfs = sorted(Path(docs_dir).rglob("*.pdf"))
-    print(f"Found {len(pdfs)} PDFs in {docs_dir}")
-    skipped = 0
-
-    for pdf_path in pdfs:
-        path = str(pdf_path)
-
-        # try PyPDF first
-        items = _try_loader(PyPDFLoader, path, password=pw)
-        if not items:
-            # then PDFMiner
-            items = _try_loader(PDFMinerLoader, path)
-
-        if not items:
-            # repair and retry
-            repaired = _sanitize_pdf(path)
-            if repaired != path:
-                items = _try_loader(PyPDFLoader, repaired, password=pw)
-                if not items:
-                    items = _try_loader(PDFMinerLoader, repaired)
-
-        if items:
-            docs.extend(items)
-        else:
-            print(f"[skip] Unreadable PDF: {os.path.basename(path)}")
-            skipped += 1
-
-    print(f"Loaded {len(docs)} pages. Skipped {skipped} file(s).")
-    return docs
-
-
 # ---------- main pipeline ----------
 
 
@@ -97,10 +40,15 @@ def main():
     api_version = get_env("AZURE_OPENAI_API_VERSION")
     emb_deploy = get_env("AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT")
     index_name = get_env("INDEX_NAME")
-
-    print(f"Loading PDFs from: {docs_dir}")
-    raw_docs = load_pdfs(docs_dir)
-    print(f"Loaded {len(raw_docs)} pages")
+    batch_size = int(get_env("INGEST_BATCH_SIZE", required=False, default="64"))
+    max_workers = int(get_env("INGEST_MAX_WORKERS", required=False, default="4"))
+    pdf_workers = int(
+        get_env("PDF_WORKERS", required=False, default=str(os.cpu_count() or 1))
+    )
+    pdf_timeout = float(get_env("PDF_TIMEOUT_SEC", required=False, default="300"))
+    manifest_path = get_env(
+        "INGEST_MANIFEST", required=False, default=manifest_path_for(index_name, "neo4j")
+    )
 
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
@@ -108,15 +56,15 @@ def main():
         length_function=len,
         separators=["\n\n", "\n", " ", ""],
     )
-    docs = splitter.split_documents(raw_docs)
-    print(f"Split into {len(docs)} chunks")
 
     embeddings = AzureOpenAIEmbeddings(
         azure_endpoint=endpoint,
         api_key=api_key,
         api_version=api_version,
         deployment=emb_deploy,
+        **azure_client_kwargs(),
     )
+    embeddings = cached_embeddings(embeddings, emb_deploy)
 
     vectorstore = Neo4jVector.from_documents(
         [],
@@ -127,16 +75,62 @@ def main():
         index_name=index_name,
     )
 
-    uuids = []
-    with tqdm(total=len(docs), desc="Embedding & inserting", unit="chunk") as pbar:
-        for doc in docs:
-            t0 = time.time()
-            ids = vectorstore.add_documents([doc])
-            uuids.extend(ids)
-            pbar.set_postfix({"last_time_sec": f"{time.time()-t0:.2f}"})
-            pbar.update(1)
+    print(f"Loading PDFs from: {docs_dir}")
+    pdfs = find_pdfs(docs_dir)
+    print(
+        f"Found {len(pdfs)} PDFs in {docs_dir} (parsing with {pdf_workers} worker(s))"
+    )
 
-    print(f"✅ Upserted {len(uuids)} vectors")
+    # only new/changed files are parsed; vectors of deleted files are removed
+    manifest = IngestManifest(
+        manifest_path, index_name, legacy_path=f".ingest_manifest/{index_name}.json"
+    )
+    changed, removed_ids = manifest.plan(pdfs, root=docs_dir, pattern="*.pdf")
+    print(f"{len(changed)} new/changed PDF(s), {len(pdfs) - len(changed)} unchanged")
+    if removed_ids:
+        vectorstore.delete(ids=removed_ids)
+        print(f"Removed {len(removed_ids)} vectors of deleted files")
+    # nodes ingested before the manifest have random ids; drop them before re-inserting
+    purged = purge_unmanaged_neo4j(vectorstore, manifest.unrecorded(changed))
+    if purged:
+        print(f"Replaced {purged} vectors ingested before the manifest")
+
+    # BM25 index and mmap vector export, kept in sync with the vector store
+    local_indexes = LocalIndexes(index_name, embeddings, neo4j_vectors(vectorstore))
+    changed = local_indexes.plan(changed, pdfs, removed_ids, manifest)
+
+    def chunks():
+        # split and hand each file to the embedder as soon as it has been parsed
+        for path, pages in iter_pdfs(
+            changed, workers=pdf_workers, timeout=pdf_timeout
+        ):
+            split_docs = splitter.split_documents(pages)
+            todo, stale_ids = manifest.update(path, split_docs)
+            if stale_ids:
+                vectorstore.delete(ids=stale_ids)
+            local_indexes.update(split_docs, stale_ids)
+            yield from todo
+
+    ingestor = BatchIngestor(
+        vectorstore, embeddings, batch_size=batch_size, max_workers=max_workers
+    )
+    uuids = ingestor.run(chunks())
+    manifest.save()
+    if changed or removed_ids:
+        local_indexes.commit()
+    if changed or removed_ids:
+        # cached answers were built on the old contents of this collection
+        dropped = invalidate_answer_cache(index_name)
+        if dropped:
+            print(f"Invalidated {dropped} cached answer(s)")
+    if hasattr(embeddings, "stats"):
+        print(f"Embedding cache: {embeddings.stats()}")
+    print(f"Azure OpenAI requests: {client_pool_stats()}")
+
+    print(
+        f"✅ Upserted {len(uuids)} vectors in {ingestor.elapsed:.1f}s "
+        f"({ingestor.chunks_per_sec:.1f} chunks/s)"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+"""Local indexes derived from a collection's chunks, kept in sync by the ingestion scripts.
+
+The BM25 index (BM25_INDEX_DIR, "keyword" strategy) and the memory-mapped
+vector export (MMAP_VECTOR_DIR, backend="mmap") follow the same chunk stream
+as the vector store: chunks of deleted or changed files are removed, re-split
+files are re-added, and both are committed once at the end of a run.
+"""
+
+import json
+from typing import Callable, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from bm25_index import bm25_writer_from_env
+from ingestion.manifest import IngestManifest
+from mmap_vector_store import mmap_writer_from_env
+
+VectorFetcher = Callable[[List[str]], Dict[str, List[float]]]
+
+
+class LocalIndexes:
+    """The enabled BM25 / vector-export writers of one collection."""
+
+    def __init__(self, collection: str, embeddings: Embeddings, fetch_vectors: Optional[VectorFetcher] = None):
+        self.embeddings = embeddings
+        self.fetch_vectors = fetch_vectors
+        self.keyword_index = bm25_writer_from_env(collection)
+        self.vector_export = mmap_writer_from_env(collection)
+        self._writers = [w for w in (self.keyword_index, self.vector_export) if w is not None]
+
+    def plan(self, changed: List[str], sources: Iterable, removed_ids: List[str], manifest: IngestManifest) -> List[str]:
+        """Drop chunks of deleted files; returns the files to split (every file when an index is new)."""
+        for writer in self._writers:
+            writer.remove(removed_ids)
+        if manifest.files and any(w.is_empty() for w in self._writers):
+            # first run with an index: re-split every file once (nothing is re-embedded)
+            return [str(p) for p in sources]
+        return changed
+
+    def update(self, split_docs: List[Document], stale_ids: List[str]):
+        """Replace one re-split file's chunks."""
+        for writer in self._writers:
+            writer.remove(stale_ids)
+            writer.add(split_docs)
+
+    def commit(self):
+        if self.keyword_index is not None:
+            self.keyword_index.commit()
+            print(f"Keyword index: {len(self.keyword_index.records)} chunks")
+        if self.vector_export is not None:
+            # vectors of new chunks are read back from the store ingestion just wrote
+            self.vector_export.commit(self.embeddings, self.fetch_vectors)
+            print(f"Vector export: {len(self.vector_export.records)} chunks")
+
+
+# ---------- stored vectors, by chunk id ----------
+
+_PGVECTOR_VECTORS_SQL = """
+SELECT e.id, e.embedding::text
+FROM langchain_pg_embedding e
+JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+WHERE c.name = %s AND e.id = ANY(%s)
+"""
+
+
+def pgvector_vectors(connection: str, collection: str, batch_size: int = 5000) -> VectorFetcher:
+    """Fetcher of stored embeddings from a PGVector collection."""
+
+    def fetch(ids: List[str]) -> Dict[str, List[float]]:
+        import psycopg
+
+        found = {}
+        with psycopg.connect(connection.replace("+psycopg", "", 1)) as conn:
+            for i in range(0, len(ids), batch_size):
+                rows = conn.execute(_PGVECTOR_VECTORS_SQL, (collection, ids[i:i + batch_size])).fetchall()
+                found.update({str(id_): json.loads(text) for id_, text in rows})
+        return found
+
+    return fetch
+
+
+def neo4j_vectors(vectorstore, batch_size: int = 5000) -> VectorFetcher:
+    """Fetcher of stored embeddings from a Neo4jVector index."""
+
+    def fetch(ids: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        for i in range(0, len(ids), batch_size):
+            rows = vectorstore.query(
+                f"MATCH (n:`{vectorstore.node_label}`) WHERE n.id IN $ids "
+                f"RETURN n.id AS id, n.`{vectorstore.embedding_node_property}` AS vector",
+                params={"ids": ids[i:i + batch_size]},
+            )
+            found.update({row["id"]: row["vector"] for row in rows})
+        return found
+
+    return fetch
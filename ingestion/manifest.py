@@ -0,0 +1,168 @@
+"""Content-hash manifest for incremental re-ingestion."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import NAMESPACE_URL, uuid5
+
+from langchain_core.documents import Document
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_sha256(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def manifest_path_for(collection: str, kind: str) -> str:
+    """Default manifest of one ingestion script (`kind`: pdf, txt, neo4j) for `collection`."""
+    return f".ingest_manifest/{collection}.{kind}.json"
+
+
+class IngestManifest:
+    """
+    Persistent record of what has been ingested into one collection:
+        {source: {"file_hash", "size", "mtime_ns", "chunks": [[chunk_hash, page, vector_id], ...]}}
+    Vector ids are derived from (collection, source, page, chunk hash, occurrence), so
+    re-inserting an unchanged chunk upserts the same row instead of duplicating it.
+
+    Each ingestion script keeps its own manifest (`manifest_path_for`), and `plan` only
+    treats files under its root matching its pattern as deleted, so scripts sharing a
+    collection never remove each other's sources. When `path` does not exist yet, the
+    manifest is seeded from `legacy_path` (the former shared `{collection}.json`).
+    """
+
+    def __init__(self, path: str, collection: str, legacy_path: Optional[str] = None):
+        self.path = path
+        self.collection = collection
+        self.files: Dict[str, Dict] = {}
+        self._hashes: Dict[str, Tuple[str, int, int]] = {}
+        self._adopted = False
+        source = path if os.path.exists(path) else legacy_path
+        if source and os.path.exists(source):
+            with open(source, encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+            self._adopted = source != path
+
+    def _file_hash(self, source: str) -> str:
+        st = os.stat(source)
+        entry = self.files.get(source, {})
+        # cheap path: same size + mtime as last run means same content
+        if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            digest = entry["file_hash"]
+        else:
+            digest = file_sha256(source)
+        self._hashes[source] = (digest, st.st_size, st.st_mtime_ns)
+        return digest
+
+    def plan(self, paths: Iterable, root: Optional[str] = None, pattern: str = "*") -> Tuple[List[str], List[str]]:
+        """
+        Compare files on disk with the manifest.
+        Returns (new/changed sources to ingest, vector ids of deleted files to remove).
+        Only recorded sources under `root` matching `pattern` count as deleted when missing.
+        """
+        sources = [str(p) for p in paths]
+        present = set(sources)
+        root_path = Path(root).resolve() if root else None
+
+        def in_scope(source: str) -> bool:
+            if not Path(source).match(pattern):
+                return False
+            return root_path is None or Path(source).resolve().is_relative_to(root_path)
+
+        stale_ids = []
+        for recorded in list(self.files):
+            if recorded in present:
+                continue
+            if in_scope(recorded):
+                stale_ids.extend(vid for _, _, vid in self.files.pop(recorded)["chunks"])
+            elif self._adopted:
+                # another script's file in the old shared manifest; it keeps its own record
+                del self.files[recorded]
+
+        changed = []
+        for source in sources:
+            digest = self._file_hash(source)
+            entry = self.files.get(source)
+            if entry and entry["file_hash"] == digest:
+                entry["size"], entry["mtime_ns"] = self._hashes[source][1:]
+            else:
+                changed.append(source)
+        return changed, stale_ids
+
+    def unrecorded(self, sources: Iterable[str]) -> List[str]:
+        """Sources with no manifest entry; their rows may predate the manifest (random ids)."""
+        return [s for s in sources if s not in self.files]
+
+    def update(self, source: str, chunks: List[Document]) -> Tuple[List[Document], List[str]]:
+        """
+        Record the new chunks of `source`, stamping `chunk_hash`/`chunk_id` metadata.
+        Returns (chunks that still need embedding, vector ids no longer present).
+        """
+        old_ids = {vid for _, _, vid in self.files.get(source, {}).get("chunks", [])}
+        entries, todo, seen = [], [], {}
+        for doc in chunks:
+            digest = chunk_sha256(doc.page_content)
+            page = doc.metadata.get("page")
+            n = seen.get((digest, page), 0)
+            seen[(digest, page)] = n + 1
+            vid = str(uuid5(NAMESPACE_URL, f"{self.collection}|{source}|{page}|{digest}|{n}"))
+            doc.metadata["chunk_hash"] = digest
+            doc.metadata["chunk_id"] = vid
+            entries.append([digest, page, vid])
+            if vid not in old_ids:
+                todo.append(doc)
+
+        new_ids = {vid for _, _, vid in entries}
+        digest, size, mtime_ns = self._hashes.get(source) or (file_sha256(source), None, None)
+        self.files[source] = {"file_hash": digest, "size": size, "mtime_ns": mtime_ns, "chunks": entries}
+        return todo, sorted(old_ids - new_ids)
+
+    def save(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"collection": self.collection, "files": self.files}, f)
+        os.replace(tmp, self.path)
+
+
+# ---------- rows ingested before the manifest ----------
+# Chunks inserted before manifests existed have random ids and no `chunk_id` metadata,
+# so re-ingesting their file would duplicate them. They are dropped per source first.
+
+_PURGE_PGVECTOR_SQL = """
+DELETE FROM langchain_pg_embedding e
+USING langchain_pg_collection c
+WHERE e.collection_id = c.uuid AND c.name = %s
+  AND e.cmetadata->>'source' = ANY(%s) AND NOT (e.cmetadata ? 'chunk_id')
+"""
+
+
+def purge_unmanaged_pgvector(connection: str, collection: str, sources: List[str]) -> int:
+    """Delete `sources`' rows without a `chunk_id` from a PGVector collection; returns the count."""
+    if not sources:
+        return 0
+    import psycopg
+
+    with psycopg.connect(connection.replace("+psycopg", "", 1)) as conn:
+        return conn.execute(_PURGE_PGVECTOR_SQL, (collection, list(sources))).rowcount
+
+
+def purge_unmanaged_neo4j(vectorstore, sources: List[str]) -> int:
+    """Delete `sources`' nodes without a `chunk_id` from a Neo4jVector index; returns the count."""
+    if not sources:
+        return 0
+    rows = vectorstore.query(
+        f"MATCH (n:`{vectorstore.node_label}`) WHERE n.source IN $sources AND n.chunk_id IS NULL "
+        "DETACH DELETE n RETURN count(*) AS deleted",
+        params={"sources": list(sources)},
+    )
+    return rows[0]["deleted"] if rows else 0
@@ -0,0 +1,151 @@
+"""Tolerant PDF loading shared by the ingestion scripts, with process-pool parsing."""
+
+import hashlib
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_community.document_loaders import PyPDFLoader, PDFMinerLoader
+
+
+class _ParseTimeout(BaseException):
+    """Raised by SIGALRM; a BaseException so `_try_loader` doesn't swallow it."""
+
+
+def _on_alarm(signum, frame):
+    raise _ParseTimeout()
+
+
+def _try_loader(loader_cls, path, **kwargs):
+    try:
+        return loader_cls(path, **kwargs).load()
+    except Exception as e:
+        print(f"[{loader_cls.__name__}] {os.path.basename(path)}: {e}")
+        return []
+
+
+def _sanitize_pdf(path: str) -> str:
+    """Rewrite/repair a problematic PDF via pikepdf/QPDF; returns repaired path or original."""
+    try:
+        import pikepdf
+        os.makedirs(".tmp_sanitized", exist_ok=True)
+        # same-named PDFs from different folders (or parallel workers) must not share a file
+        tag = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+        out_path = os.path.join(".tmp_sanitized", f"{tag}-{os.path.basename(path)}")
+        with pikepdf.open(path) as pdf:
+            # linearize & clean objects; helps with bad resource refs/xrefs
+            pdf.save(out_path, linearize=True)
+        return out_path
+    except Exception as e:
+        print(f"[pikepdf] couldn't sanitize {os.path.basename(path)}: {e}")
+        return path
+
+
+def load_pdf(path: str, password: Optional[str] = None) -> List[Document]:
+    """
+    Load one PDF with a tolerant fallback chain:
+      1) PyPDFLoader (fast; supports passwords)
+      2) PDFMinerLoader (robust text extractor)
+      3) Sanitize via pikepdf, then retry 1) and 2)
+    """
+    # try PyPDF first
+    items = _try_loader(PyPDFLoader, path, password=password)
+    if not items:
+        # then PDFMiner
+        items = _try_loader(PDFMinerLoader, path)
+
+    if not items:
+        # repair and retry
+        repaired = _sanitize_pdf(path)
+        if repaired != path:
+            items = _try_loader(PyPDFLoader, repaired, password=password)
+            if not items:
+                items = _try_loader(PDFMinerLoader, repaired)
+    return items
+
+
+def _load_pdf_worker(path: str, password: Optional[str], timeout: Optional[float]) -> Tuple[str, List[Document], str]:
+    """Pool entry point: load one PDF, giving up after `timeout` seconds (POSIX only)."""
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        items = load_pdf(path, password)
+        return path, items, "ok" if items else "unreadable"
+    except _ParseTimeout:
+        return path, [], "timeout"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def find_pdfs(docs_dir: str) -> List[Path]:
+    return sorted(Path(docs_dir).rglob("*.pdf"))
+
+
+def iter_pdfs(
+    pdfs: Sequence[Path],
+    workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    default_password_env: str = "PDF_PASSWORD",
+) -> Iterator[Tuple[str, List[Document]]]:
+    """
+    Yield (path, pages) for each readable PDF as soon as it has been parsed.
+    `workers` > 1 parses in a process pool (defaults to all cores); 1 parses in-process.
+    Files taking longer than `timeout` seconds are skipped.
+    """
+    pw = os.getenv(default_password_env, "") or None
+    workers = workers or os.cpu_count() or 1
+    paths = [str(p) for p in pdfs]
+    loaded = skipped = 0
+
+    def report(path, items, status):
+        nonlocal loaded, skipped
+        if items:
+            loaded += len(items)
+            return True
+        if status == "timeout":
+            print(f"[skip] Timed out after {timeout}s: {os.path.basename(path)}")
+        else:
+            print(f"[skip] Unreadable PDF: {os.path.basename(path)}")
+        skipped += 1
+        return False
+
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            _, items, status = _load_pdf_worker(path, pw, timeout)
+            if report(path, items, status):
+                yield path, items
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            futures = {pool.submit(_load_pdf_worker, path, pw, timeout): path for path in paths}
+            for fut in as_completed(futures):
+                try:
+                    path, items, status = fut.result()
+                except Exception as e:
+                    path, items, status = futures[fut], [], "unreadable"
+                    print(f"[worker] {os.path.basename(path)}: {e}")
+                if report(path, items, status):
+                    yield path, items
+
+    print(f"Loaded {loaded} pages. Skipped {skipped} file(s).")
+
+
+def load_pdfs(
+    docs_dir: str,
+    default_password_env: str = "PDF_PASSWORD",
+    workers: Optional[int] = 1,
+    timeout: Optional[float] = None,
+) -> List[Document]:
+    """Load every PDF under `docs_dir` into one list of pages."""
+    pdfs = find_pdfs(docs_dir)
+    print(f"Found {len(pdfs)} PDFs in {docs_dir}")
+    docs = []
+    for _, items in iter_pdfs(pdfs, workers, timeout, default_password_env):
+        docs.extend(items)
+    return docs
@@ -0,0 +1,130 @@
+"""Per-node chat model routing and usage tracking for the RAG pipelines.
+
+Every graph node (analyze, plan, assess, decide, assess_and_decide,
+synthesize, verify) gets its own route: deployment, output token cap,
+request timeout and temperature. Routes come from the defaults below, then
+the LLM_ROUTES environment variable (JSON), then the pipeline constructor,
+e.g.
+
+    LLM_ROUTES='{"*": {"deployment": "gpt-4o-mini"}, "synthesize": {"deployment": "gpt-4o", "max_tokens": 4096}}'
+
+`NodeUsageTracker` records calls, latency and token usage per node so the
+routing can be tuned from data.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from multi_hops_schemas import NODE_MAX_TOKENS
+
+
+@dataclass(frozen=True)
+class Route:
+    deployment: Optional[str] = None  # None: AZURE_OPENAI_CHAT_DEPLOYMENT
+    max_tokens: int = 4096
+    timeout: float = 60.0
+    temperature: float = 0.0
+
+
+DEFAULT_ROUTES: Dict[str, Route] = {
+    "analyze": Route(max_tokens=NODE_MAX_TOKENS["analyze"], timeout=30.0),
+    "plan": Route(max_tokens=NODE_MAX_TOKENS["plan"], timeout=30.0, temperature=0.2),
+    "assess": Route(max_tokens=NODE_MAX_TOKENS["assess"], timeout=60.0),
+    "decide": Route(max_tokens=NODE_MAX_TOKENS["decide"], timeout=30.0),
+    "assess_and_decide": Route(max_tokens=NODE_MAX_TOKENS["assess_and_decide"], timeout=60.0),
+    "synthesize": Route(max_tokens=4096, timeout=120.0),
+    "verify": Route(max_tokens=NODE_MAX_TOKENS["verify"], timeout=60.0),
+}
+
+
+def load_routes(overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Route]:
+    """Defaults, then LLM_ROUTES (JSON), then `overrides`; a "*" entry applies to every node."""
+    layers = [json.loads(os.getenv("LLM_ROUTES") or "{}"), overrides or {}]
+    routes = dict(DEFAULT_ROUTES)
+    for layer in layers:
+        unknown = set(layer) - set(routes) - {"*"}
+        if unknown:
+            raise ValueError(f"Unknown LLM route node(s): {sorted(unknown)}")
+        for node in routes:
+            for key in ("*", node):
+                if key in layer:
+                    routes[node] = replace(routes[node], **layer[key])
+    return routes
+
+
+class _NodeCallback(BaseCallbackHandler):
+    def __init__(self, tracker: "NodeUsageTracker", node: str):
+        self.tracker = tracker
+        self.node = node
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self.tracker._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self.tracker._start(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        self.tracker._end(self.node, run_id, response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self.tracker._end(self.node, run_id, None)
+
+
+class NodeUsageTracker:
+    """Thread-safe per-node counters of calls, errors, latency and tokens."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[UUID, float] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def callback(self, node: str) -> BaseCallbackHandler:
+        return _NodeCallback(self, node)
+
+    def _start(self, run_id: UUID):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _end(self, node: str, run_id: UUID, response: Optional[LLMResult]):
+        prompt_tokens, completion_tokens = _token_usage(response) if response else (0, 0)
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            stats = self._stats.setdefault(
+                node, {"calls": 0, "errors": 0, "latency_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            stats["calls"] += 1
+            stats["errors"] += response is None
+            stats["latency_s"] += time.perf_counter() - started if started else 0.0
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                node: {**s, "avg_latency_s": s["latency_s"] / s["calls"] if s["calls"] else 0.0}
+                for node, s in self._stats.items()
+            }
+
+
+def _token_usage(response: LLMResult):
+    """(prompt, completion) tokens from llm_output, or from message usage when streamed."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0) or 0, usage.get("completion_tokens", 0) or 0
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            meta = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt += meta.get("input_tokens", 0)
+            completion += meta.get("output_tokens", 0)
+    return prompt, completion
@@ -0,0 +1,289 @@
+"""In-process, memory-mapped vector store: a retrieval backend with no database.
+
+Exported per collection by the ingestion scripts (MMAP_VECTOR_DIR) from the
+same chunk stream that goes to PGVector / Neo4j, one generation directory per
+rebuild (see `versioned_dir`):
+
+    meta.json         collection, doc count, dims
+    vectors.npy       float32 (n_docs, dims), L2-normalized rows
+    docs.jsonl        one {"id", "text", "metadata"} record per chunk
+    doc_offsets.npy   int64 byte offset of each docs.jsonl line (+1 sentinel)
+
+`MmapVectorStore` memory-maps the files and answers similarity, MMR and
+batched multi-query searches with NumPy matrix products (cosine), so
+read-only worker replicas need no DB round-trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from versioned_dir import current_dir, publish
+
+# (doc, distance, embedding or None) per candidate, nearest first
+Candidates = List[Tuple[Document, float, Optional[np.ndarray]]]
+
+# Rows scored per matrix product; bounds the (queries x rows) score buffer
+_SCAN_ROWS = 65_536
+
+
+def mmr(query_vector: List[float], candidates: Candidates, k: int, lambda_mult: float = 0.5) -> List[Document]:
+    """Maximal marginal relevance over candidates fetched with their embeddings (cosine)."""
+    if not candidates:
+        return []
+    matrix = np.stack([vector for _, _, vector in candidates])
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    relevance = matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = matrix @ matrix[selected[0]]
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+    return [candidates[i][0] for i in selected]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12)
+
+
+def vector_dir_for(collection: str, root: Optional[str] = None) -> Optional[Path]:
+    """Directory of `collection`'s export under MMAP_VECTOR_DIR (None when disabled)."""
+    root = os.getenv("MMAP_VECTOR_DIR", "") if root is None else root
+    return Path(root) / collection if root else None
+
+
+class MmapVectorStore(VectorStore):
+    """Read-only cosine vector store over a memory-mapped export."""
+
+    def __init__(self, path: Path, embedding: Embeddings):
+        self.path = Path(path)
+        self.embedding = embedding
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+        self.doc_offsets = np.load(self.path / "doc_offsets.npy", mmap_mode="r")
+        self._docs_file = open(self.path / "docs.jsonl", "rb")
+        self._docs = mmap.mmap(self._docs_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def load(cls, collection: str, embedding: Embeddings, root: Optional[str] = None) -> "MmapVectorStore":
+        path = current_dir(vector_dir_for(collection, root))
+        if path is None or not (path / "meta.json").exists():
+            raise FileNotFoundError(
+                f"No memory-mapped export of {collection!r}; set MMAP_VECTOR_DIR and re-run ingestion"
+            )
+        return cls(path, embedding)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def _doc(self, i: int) -> Document:
+        record = json.loads(self._docs[int(self.doc_offsets[i]):int(self.doc_offsets[i + 1])])
+        return Document(id=record["id"], page_content=record["text"], metadata=record["metadata"])
+
+    def _top_k(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, similarities) of each query's top-k rows, best first."""
+        n = self.vectors.shape[0]
+        k = min(k, n)
+        best_idx = np.empty((len(queries), 0), dtype=np.int64)
+        best_sim = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, n, _SCAN_ROWS):
+            sims = queries @ self.vectors[start:start + _SCAN_ROWS].T
+            idx = np.concatenate([best_idx, np.arange(start, start + sims.shape[1])[None, :].repeat(len(queries), 0)], 1)
+            sims = np.concatenate([best_sim, sims], 1)
+            if sims.shape[1] > k:
+                part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+                idx = np.take_along_axis(idx, part, 1)
+                sims = np.take_along_axis(sims, part, 1)
+            best_idx, best_sim = idx, sims
+        order = np.argsort(-best_sim, axis=1, kind="stable")
+        return np.take_along_axis(best_idx, order, 1), np.take_along_axis(best_sim, order, 1)
+
+    # ----------------------------- batch search ------------------------------
+
+    def search(
+        self, vectors: List[List[float]], k: int, with_embeddings: bool = False, complexity: Optional[float] = None
+    ) -> List[Candidates]:
+        """Top-`k` (doc, cosine distance, vector) per query; same shape as `PGVectorSearch.asearch`."""
+        if not vectors or not self.vectors.shape[0]:
+            return [[] for _ in vectors]
+        indices, sims = self._top_k(_normalize(vectors), k)
+        return [
+            [
+                (self._doc(i), 1.0 - float(s), np.array(self.vectors[i]) if with_embeddings else None)
+                for i, s in zip(row_idx, row_sim)
+            ]
+            for row_idx, row_sim in zip(indices, sims)
+        ]
+
+    async def asearch(
+        self, vectors: List[List[float]], k: int, with_embeddings: bool = False, complexity: Optional[float] = None
+    ) -> List[Candidates]:
+        return await asyncio.to_thread(self.search, vectors, k, with_embeddings, complexity)
+
+    # ------------------------------ VectorStore ------------------------------
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return [(doc, distance) for doc, distance, _ in self.search([embedding], k)[0]]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k)
+
+    def max_marginal_relevance_search_by_vector(
+        self, embedding: List[float], k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, **kwargs: Any
+    ) -> List[Document]:
+        candidates = self.search([embedding], fetch_k, with_embeddings=True)[0]
+        return mmr(embedding, candidates, k, lambda_mult)
+
+    def max_marginal_relevance_search(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, **kwargs: Any
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self.embedding.embed_query(query), k, fetch_k, lambda_mult
+        )
+
+    async def asimilarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return [(doc, distance) for doc, distance, _ in (await self.asearch([embedding], k))[0]]
+
+    async def asimilarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score_by_vector(embedding, k)]
+
+    async def amax_marginal_relevance_search_by_vector(
+        self, embedding: List[float], k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, **kwargs: Any
+    ) -> List[Document]:
+        candidates = (await self.asearch([embedding], fetch_k, with_embeddings=True))[0]
+        return mmr(embedding, candidates, k, lambda_mult)
+
+    async def amax_marginal_relevance_search(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, **kwargs: Any
+    ) -> List[Document]:
+        return await self.amax_marginal_relevance_search_by_vector(
+            await self.embedding.aembed_query(query), k, fetch_k, lambda_mult
+        )
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        raise NotImplementedError("MmapVectorStore is read-only; it is exported by the ingestion scripts")
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs):
+        raise NotImplementedError("MmapVectorStore is exported by the ingestion scripts")
+
+
+class MmapVectorWriter:
+    """
+    Incrementally maintained export of one collection; `commit` publishes a new generation.
+    Chunks are keyed by their `chunk_id` metadata, so re-adding a chunk replaces it.
+    Vectors of unchanged chunks are reused; new ones are read back from the vector
+    store ingestion has just written (`fetch_vectors`), and only embedded as a fallback.
+    """
+
+    def __init__(self, collection: str, root: Optional[str] = None):
+        self.collection = collection
+        self.path = vector_dir_for(collection, root)
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._stored: Dict[str, np.ndarray] = {}
+        current = current_dir(self.path)
+        if current is not None and (current / "meta.json").exists():
+            vectors = np.load(current / "vectors.npy", mmap_mode="r")
+            with open(current / "docs.jsonl", encoding="utf-8") as f:
+                for i, line in enumerate(f):
+                    record = json.loads(line)
+                    self.records[record["id"]] = record
+                    self._stored[record["id"]] = vectors[i]
+
+    def is_empty(self) -> bool:
+        return not self.records
+
+    def add(self, docs: Iterable[Document]):
+        for doc in docs:
+            cid = doc.metadata.get("chunk_id") or str(uuid4())
+            self.records[cid] = {"id": cid, "text": doc.page_content, "metadata": doc.metadata}
+            self._stored.pop(cid, None)  # content may have changed
+
+    def remove(self, ids: Iterable[str]):
+        for cid in ids:
+            self.records.pop(cid, None)
+            self._stored.pop(cid, None)
+
+    def commit(
+        self,
+        embeddings: Embeddings,
+        fetch_vectors: Optional[Callable[[List[str]], Dict[str, List[float]]]] = None,
+        batch_size: int = 256,
+    ):
+        """Fill in vectors of new chunks and publish the export as a new generation."""
+        records = list(self.records.values())
+        missing = [r for r in records if r["id"] not in self._stored]
+        if missing and fetch_vectors is not None:
+            for cid, vector in fetch_vectors([r["id"] for r in missing]).items():
+                self._stored[cid] = np.asarray(vector, dtype=np.float32)
+            missing = [r for r in missing if r["id"] not in self._stored]
+        if missing:
+            print(f"[vector export] {len(missing)} chunk(s) have no stored vector; embedding them")
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i:i + batch_size]
+            for record, vector in zip(batch, embeddings.embed_documents([r["text"] for r in batch])):
+                self._stored[record["id"]] = np.asarray(vector, dtype=np.float32)
+
+        dims = len(next(iter(self._stored.values()))) if records else 0
+        vectors = np.zeros((len(records), dims), dtype=np.float32)
+        for i, record in enumerate(records):
+            vectors[i] = self._stored[record["id"]]
+        vectors = _normalize(vectors) if len(records) else vectors
+
+        lines = [
+            (json.dumps(r, ensure_ascii=False, default=str) + "\n").encode("utf-8") for r in records
+        ]
+        doc_offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        np.cumsum([len(line) for line in lines], out=doc_offsets[1:])
+
+        meta = {"collection": self.collection, "n_docs": len(records), "dims": dims}
+
+        def fill(directory: Path):
+            np.save(directory / "vectors.npy", vectors)
+            with open(directory / "docs.jsonl", "wb") as f:
+                f.writelines(lines)
+            np.save(directory / "doc_offsets.npy", doc_offsets)
+            (directory / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+        # readers switch to the new generation only once every file is complete
+        publish(self.path, fill)
+        self._stored = {r["id"]: vectors[i] for i, r in enumerate(records)}
+
+
+def mmap_writer_from_env(collection: str) -> Optional[MmapVectorWriter]:
+    """Writer for MMAP_VECTOR_DIR (default empty: no export)."""
+    if vector_dir_for(collection) is None:
+        return None
+    return MmapVectorWriter(collection)
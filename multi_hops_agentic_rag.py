@@ -18,12 +18,19 @@ from __future__ import annotations
 
 import json
 import asyncio
+import hashlib
+import math
+import re
+import threading
+import weakref
+from collections import Counter
+from functools import lru_cache, partial
 from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Any, Tuple, TypedDict
 import os
 from uuid import uuid4
-import time
 
+import tiktoken
 from dotenv import load_dotenv
 
 from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
@@ -35,10 +42,30 @@ from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 
+from answer_cache import AnswerCache, answer_cache_from_env
+from azure_clients import azure_client_kwargs, client_pool_stats
+from bm25_index import BM25Index
+from decision_rules import estimate_complexity, rule_based_decision
+from embedding_cache import cached_embeddings
+from llm_routing import NodeUsageTracker, load_routes
+from mmap_vector_store import MmapVectorStore, mmr
+from pgvector_batch import PGVectorSearch
+from pgvector_index import recorded_index
+from multi_hops_schemas import (
+    AssessAndDecide,
+    ContextAssessment,
+    Decision,
+    IncrementalAssessment,
+    QueryPlan,
+    QuestionAnalysis,
+    Verification,
+)
 from multi_hops_prompts import (
     QUESTION_ANALYSIS_PROMPT,
     MULTI_QUERY_PLANNING_PROMPT,
+    ASSESS_AND_DECIDE_PROMPT,
     CONTEXT_ASSESSMENT_PROMPT,
+    INCREMENTAL_ASSESSMENT_PROMPT,
     DECISION_MAKING_PROMPT,
     ENHANCED_SYNTHESIS_PROMPT,
     ADVANCED_VERIFICATION_PROMPT,
@@ -56,6 +83,7 @@ from multi_hops_prompts import (
 class EnhancedAgentState(TypedDict, total=False):
     # Input
     question: str
+    run_id: str  # per-run key for work kept outside the state (speculative prefetch)
     
     # Question Analysis
     question_complexity: float  # 1-10 scale
@@ -67,11 +95,15 @@ class EnhancedAgentState(TypedDict, total=False):
     # Planning
     sub_questions: List[Dict[str, Any]]  # Multiple sub-questions with priorities
     current_query_batch: List[str]
+    asked_queries: List[str]  # every query already retrieved in this run
+    pending_sub_questions: List[Dict[str, Any]]  # planned but not yet asked, highest priority first
+    planned_gaps: List[str]  # information gaps the pending queue was planned for
     
     # Retrieval
     retrieval_strategies: List[str]
     parallel_results: Dict[str, List[Document]]
     fused_results: List[Document]
+    new_evidence: List[Document]  # fused docs not already in evidence_docs
     
     # Assessment
     context_quality_score: float
@@ -87,6 +119,7 @@ class EnhancedAgentState(TypedDict, total=False):
     continue_probability: float
     stop_reasons: List[str]
     recent_quality_improvements: List[float]
+    decision_source: str  # "rules" or "llm"
     
     # Synthesis
     answer_confidence: float
@@ -122,32 +155,319 @@ def _format_docs(docs: List[Document]) -> str:
     return "\n".join(lines)
 
 
-def _dedupe_docs(docs: List[Document]) -> List[Document]:
-    """Remove duplicate documents based on (source, page) metadata."""
+# Per-node prompt budgets for evidence (tokens). Verification defaults to the
+# synthesis budget so it sees the same [S#] numbering the answer cites.
+DEFAULT_EVIDENCE_TOKEN_BUDGETS = {"assess": 6000, "synthesis": 12000, "verify": 12000}
+
+_TERM_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _select_evidence(
+    docs: List[Document],
+    query: str,
+    budget: Optional[int],
+    model: str = "gpt-4o",
+) -> List[Document]:
+    """Rank docs by fused retrieval score and keep the best that fit `budget` tokens.
+
+    The `fusion_score` stamped by `_fuse_results` is the primary key; term
+    overlap with `query`, then earlier retrieval order, break ties. Returns docs
+    best-first. A falsy budget keeps every doc (still ranked).
+    """
+    query_terms = set(_TERM_RE.findall(query.lower()))
+    doc_terms = [set(_TERM_RE.findall((d.page_content or "").lower())) for d in docs]
+
+    # idf over the evidence pool so rare query terms (e.g. "46a", "mt700") dominate
+    n = len(docs)
+    idf = {t: math.log(1 + n / (1 + sum(t in terms for terms in doc_terms))) for t in query_terms}
+    overlap = [sum(idf[t] for t in query_terms & terms) for terms in doc_terms]
+    fused = [d.metadata.get("fusion_score", 0.0) for d in docs]
+    ranked = [docs[i] for i in sorted(range(n), key=lambda i: (-fused[i], -overlap[i], i))]
+    if not budget:
+        return ranked
+
+    enc = _get_encoding(model)
+    selected, used = [], 0
+    for d in ranked:
+        cost = len(enc.encode(d.page_content or "")) + 16  # + [S#] header
+        if used + cost <= budget:
+            selected.append(d)
+            used += cost
+    return selected
+
+
+def _doc_key(d: Document) -> str:
+    """Content hash of a chunk: the `chunk_hash` stamped at ingestion, else computed.
+
+    Distinct chunks of one page stay distinct, and byte-identical chunks from
+    duplicate files collapse to one.
+    """
+    return d.metadata.get("chunk_hash") or hashlib.sha256((d.page_content or "").encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _simhash(text: str) -> int:
+    """64-bit SimHash over word 3-shingles (near-identical texts differ in few bits)."""
+    words = _TERM_RE.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _dedupe_docs(docs: List[Document], near_duplicate_bits: Optional[int] = None) -> List[Document]:
+    """Remove duplicate chunks by content hash, keeping the first occurrence.
+
+    With `near_duplicate_bits`, chunks whose SimHash is within that Hamming
+    distance of an already kept chunk are dropped as well.
+    """
     seen = set()
+    kept_hashes: List[int] = []
     out = []
     for d in docs:
-        key = (d.metadata.get("source"), d.metadata.get("page"))
-        if key not in seen:
-            seen.add(key)
-            out.append(d)
+        key = _doc_key(d)
+        if key in seen:
+            continue
+        if near_duplicate_bits is not None:
+            h = _simhash(d.page_content or "")
+            if any(bin(h ^ k).count("1") <= near_duplicate_bits for k in kept_hashes):
+                continue
+            kept_hashes.append(h)
+        seen.add(key)
+        out.append(d)
+    return out
+
+
+# Ranked hits of one retriever call; score is None when the search has none (MMR)
+ScoredDocs = List[Tuple[Document, Optional[float]]]
+
+
+def _normalized_scores(hits: ScoredDocs) -> List[float]:
+    """Min-max normalize one result list; rank-derived scores when it has none."""
+    if any(score is None for _, score in hits):
+        return [1.0 / (1 + rank) for rank in range(len(hits))]
+    scores = [score for _, score in hits]
+    lo, hi = min(scores, default=0.0), max(scores, default=0.0)
+    return [(s - lo) / (hi - lo) if hi > lo else 1.0 for s in scores]
+
+
+def _fuse_results(
+    ranked_lists: List[Tuple[str, ScoredDocs]],
+    method: str = "rrf",
+    weights: Optional[Dict[str, float]] = None,
+    limit: Optional[int] = None,
+    rrf_k: int = 60,
+) -> List[Document]:
+    """Fuse (retriever, hits) lists into one ranked, deduplicated list.
+
+    "rrf" sums weight / (rrf_k + rank); "weighted" sums weight * min-max
+    normalized score. Returned docs are copies carrying metadata["fusion_score"];
+    first-seen order breaks ties.
+    """
+    fused: Dict[Any, float] = {}
+    first: Dict[Any, Document] = {}
+    for part, hits in ranked_lists:
+        weight = (weights or {}).get(part, 1.0)
+        normalized = _normalized_scores(hits) if method == "weighted" else None
+        for rank, (doc, _) in enumerate(hits):
+            key = _doc_key(doc)
+            gain = weight / (rrf_k + rank + 1) if normalized is None else weight * normalized[rank]
+            fused[key] = fused.get(key, 0.0) + gain
+            first.setdefault(key, doc)
+
+    ranked = sorted(fused, key=lambda key: -fused[key])[:limit]
+    return [
+        Document(page_content=first[key].page_content, metadata={**first[key].metadata, "fusion_score": fused[key]})
+        for key in ranked
+    ]
+
+
+def _with_defaults(result: Optional[Dict[str, Any]], default: Dict[str, Any]) -> Dict[str, Any]:
+    """A node's structured result, or `default` when its output stayed invalid."""
+    return result if result is not None else default
+
+
+def _strategy_parts(strategy: str, keyword: bool = False) -> List[str]:
+    """Retriever calls behind a planner strategy.
+
+    With a keyword (BM25) index "keyword" is lexical only and hybrid (or unknown)
+    runs semantic + keyword; without one "keyword" falls back to similarity and
+    hybrid runs both vector retrievers.
+    """
+    if strategy in ("semantic", "similarity"):
+        return [strategy]
+    if strategy == "keyword":
+        return ["keyword" if keyword else "similarity"]
+    return ["semantic", "keyword" if keyword else "similarity"]
+
+
+def _retrieval_calls(
+    queries: List[str], strategies: Dict[str, str], keyword: bool = False
+) -> List[Tuple[str, str]]:
+    """Unique (query, retriever) calls of a hop, in query order."""
+    calls = []
+    for query in queries:
+        for part in _strategy_parts(strategies[query], keyword):
+            if (query, part) not in calls:
+                calls.append((query, part))
+    return calls
+
+
+def _bullets(items: List[Any], limit: int) -> str:
+    """Last `limit` items as a bullet list for prompts ("None" when empty)."""
+    return "\n".join(f"- {item}" for item in items[-limit:]) or "None"
+
+
+def _merge_unique(existing: List[Any], new: List[Any]) -> List[Any]:
+    """Append `new` items not already present, keeping order."""
+    out = list(existing)
+    for item in new:
+        if item not in out:
+            out.append(item)
     return out
 
 
-def _safe_json_parse(text: str, default: Dict[str, Any] = None) -> Dict[str, Any]:
-    """Safely parse JSON text, returning default if parsing fails."""
-    if default is None:
-        default = {}
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _drop_similar_queries(
+    sub_questions: List[Dict[str, Any]],
+    asked: List[str],
+    vectors: List[List[float]],
+    threshold: Optional[float],
+) -> List[Dict[str, Any]]:
+    """Drop sub-questions already asked (or planned twice), in priority order.
+
+    `vectors` embeds `asked` followed by the sub-question queries; without
+    vectors only exact (case-insensitive) repeats are dropped.
+    """
+    seen_text = {q.strip().lower() for q in asked}
+    seen_vectors = list(vectors[:len(asked)])
+    fresh = []
+    for sq, vector in zip(sub_questions, vectors[len(asked):] or [None] * len(sub_questions)):
+        text = sq["query"].strip().lower()
+        if text in seen_text:
+            continue
+        if vector is not None and any(_cosine(vector, v) >= threshold for v in seen_vectors):
+            continue
+        seen_text.add(text)
+        if vector is not None:
+            seen_vectors.append(vector)
+        fresh.append(sq)
+    return fresh
+
+
+def _gaps_changed(planned: List[str], current: List[str], overlap: float = 0.4) -> bool:
+    """True when a current gap matches no planned gap (word-set Jaccard below `overlap`)."""
+    planned_terms = [set(_TERM_RE.findall(g.lower())) for g in planned]
+    for gap in current:
+        terms = set(_TERM_RE.findall(gap.lower()))
+        if not any(terms and len(terms & p) / len(terms | p) >= overlap for p in planned_terms):
+            return True
+    return False
+
+
+def _empty_assessment() -> Dict[str, Any]:
+    """Assessment returned when retrieval has produced no evidence yet."""
+    return {
+        "context_quality_score": 0.0,
+        "coverage_score": 0.0,
+        "evidence_strength": 0.0,
+        "information_gaps": ["No relevant documents found"],
+        "detected_contradictions": [],
+        "sufficiency_assessment": "insufficient",
+        "key_findings": [],
+        "gaps": ["No relevant documents found"]  # For compatibility
+    }
+
+
+def _no_evidence_answer() -> Dict[str, Any]:
+    return {
+        "final_answer": "I couldn't find any relevant evidence in the knowledge base for this query.",
+        "answer_confidence": 0.0
+    }
+
+
+def _stream_event(mode: str, chunk: Any) -> Optional[Dict[str, Any]]:
+    """Map a LangGraph ("updates" | "messages") stream chunk to a UI event."""
+    if mode == "updates":
+        if not isinstance(chunk, dict) or not chunk:
+            return None
+        node, payload = next(iter(chunk.items()))
+        return {"node": node, "update": payload}
+
+    # "messages": (message chunk, metadata); only the synthesis answer is user-facing text
+    message, metadata = chunk
+    if metadata.get("langgraph_node") == "enhanced_synthesis" and getattr(message, "content", ""):
+        return {"node": "enhanced_synthesis", "token": message.content}
+    return None
+
+
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Process-wide event loop of the sync entry points, run on one daemon thread.
+
+    Every `ask`/`stream` caller shares it (Streamlit runs each rerun on a new
+    thread), so per-loop async connections are opened once and reused.
+    """
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="rag-sync-loop", daemon=True).start()
+        return _sync_loop
+
+
+def _run_sync(coro):
+    """Run `coro` on the background loop and wait for its result."""
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("ask()/stream() cannot be called from the pipeline's own loop; use aask()/astream()")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()  # e.g. KeyboardInterrupt: stop the run instead of leaving it on the loop
+        raise
+
+
+async def _await(awaitable):
+    # run_coroutine_threadsafe takes coroutines only, not async-generator awaitables
+    return await awaitable
+
+
+def _iter_sync(agen):
+    """Iterate an async generator on the background loop from sync code."""
     try:
-        # Try to extract JSON from text if it's wrapped in other content
-        start = text.find('{')
-        end = text.rfind('}') + 1
-        if start >= 0 and end > start:
-            json_text = text[start:end]
-            return json.loads(json_text)
-        return json.loads(text)
-    except (json.JSONDecodeError, ValueError):
-        return default
+        while True:
+            try:
+                yield _run_sync(_await(agen.__anext__()))
+            except StopAsyncIteration:
+                return
+    finally:
+        _run_sync(_await(agen.aclose()))
 
 
 # -----------------------------------------------------------------------------
@@ -155,20 +475,43 @@ def _safe_json_parse(text: str, default: Dict[str, Any] = None) -> Dict[str, Any
 # -----------------------------------------------------------------------------
 
 class EnhancedRAGPipeline:
-    """Enhanced RAG pipeline with intelligent agent loop."""
+    """Enhanced RAG pipeline with intelligent agent loop.
+
+    The graph nodes are async, so `aask`/`astream` let one worker multiplex many
+    questions; `ask`/`stream` are thin wrappers that drive them on one
+    process-wide background event loop.
+    """
 
-    def __init__(self, max_iters: int = 8, min_iters: int = 2):
+    def __init__(
+        self,
+        max_iters: int = 8,
+        min_iters: int = 2,
+        retrieval_workers: int = 8,
+        retrieval_timeout: float = 20.0,
+        evidence_token_budgets: Optional[Dict[str, int]] = None,
+        assessment_mode: str = "full",
+        answer_cache: Optional[AnswerCache] = None,
+        fusion: str = "rrf",
+        fusion_weights: Optional[Dict[str, float]] = None,
+        fusion_top_k: Optional[int] = 20,
+        near_duplicate_bits: Optional[int] = None,
+        fast_path: bool = False,
+        graph_mode: str = "standard",
+        speculative_prefetch: bool = False,
+        query_dedupe_threshold: Optional[float] = 0.9,
+        llm_routes: Optional[Dict[str, Dict[str, Any]]] = None,
+        batch_search: bool = False,
+        backend: str = "pgvector",
+    ):
         # Load environment variables
         load_dotenv()
 
         # Environment
-        self.db_url = os.environ["PGVECTOR_DATABASE_URL"]
         self.endpoint = os.environ["AZURE_OPENAI_ENDPOINT"]
         self.api_key = os.environ["AZURE_OPENAI_API_KEY"]
         self.api_version = os.environ["AZURE_OPENAI_API_VERSION"]
         self.chat_deployment = os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT"]
         self.emb_deployment = os.environ["AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT"]
-        self.collections = os.environ["COLLECTION_NAME"]
 
         # Embeddings and vector store
         self.embeddings = AzureOpenAIEmbeddings(
@@ -176,67 +519,346 @@ class EnhancedRAGPipeline:
             api_key=self.api_key,
             api_version=self.api_version,
             deployment=self.emb_deployment,
+            **azure_client_kwargs(),
         )
+        # Persistent cache: repeated chunks and sub-questions are embedded once
+        self.embeddings = cached_embeddings(self.embeddings, self.emb_deployment)
+
+        # "pgvector", "neo4j" or "mmap" (in-process export written by ingestion)
+        if backend not in ("pgvector", "neo4j", "mmap"):
+            raise ValueError(f"Unknown backend: {backend!r}")
+        self.backend = backend
+        self.vectorstore = self._build_vectorstore()
+        # async drivers are bound to the event loop that opened them: one per loop
+        self._async_vectorstores: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+        # All vector calls of a hop in one SQL round-trip (None: one store call each)
+        self.batch_search = self._build_batch_search() if batch_search else None
+        if self.backend == "pgvector" and self.batch_search is None:
+            self._warn_unused_ann_index()
+
+        # Multiple retrievers for different strategies
+        self.retriever_configs = {
+            "semantic": {
+                "search_type": "mmr",
+                "search_kwargs": {"k": 6, "fetch_k": 24, "lambda_mult": 0.5},
+            },
+            "similarity": {
+                "search_type": "similarity",
+                "search_kwargs": {"k": 8},
+            },
+        }
+        # Lexical retriever for "keyword" queries; only once ingestion has built the index
+        self.keyword_index = BM25Index.load(self.collections)
+        if self.keyword_index is not None:
+            self.retriever_configs["keyword"] = {"search_type": "bm25", "search_kwargs": {"k": 8}}
+
+        # Fusion of per-retriever rankings: "rrf" or "weighted" (per-retriever weights)
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"Unknown fusion: {fusion!r}")
+        self.fusion = fusion
+        self.fusion_weights = fusion_weights or {}
+        self.fusion_top_k = fusion_top_k
+        # SimHash Hamming distance under which chunks count as near-duplicates (None: exact only)
+        self.near_duplicate_bits = near_duplicate_bits
+        # Heuristic analysis and rule-based stop decisions; the LLM only sees ambiguous cases
+        self.fast_path = fast_path
+        # "standard" runs advanced_assess then intelligent_decide; "fused" asks for
+        # the assessment and the continue/stop decision in a single LLM call
+        if graph_mode not in ("standard", "fused"):
+            raise ValueError(f"Unknown graph_mode: {graph_mode!r}")
+        self.graph_mode = graph_mode
+        # Retrieve the next lower-priority sub-questions while the current hop is
+        # assessed; a "continue" decision adopts them as the next hop's batch
+        self.speculative_prefetch = speculative_prefetch
+        self._speculations: Dict[str, Dict[str, Any]] = {}
+        self._speculation_lock = threading.Lock()
+        # Planned sub-questions are queued and consumed over later hops; the planner
+        # only runs again when the queue is empty or the information gaps change.
+        # New sub-questions within this cosine similarity of an asked query are dropped.
+        self.query_dedupe_threshold = query_dedupe_threshold
+
+        # One chat client per node: deployment, token cap, timeout and temperature
+        # come from llm_routing defaults < LLM_ROUTES < `llm_routes`
+        self.llm_routes = load_routes(llm_routes)
+        self.llm_usage = NodeUsageTracker()
+        self.llms = {
+            node: AzureChatOpenAI(
+                azure_endpoint=self.endpoint,
+                api_key=self.api_key,
+                api_version=self.api_version,
+                deployment_name=route.deployment or self.chat_deployment,
+                temperature=route.temperature,
+                max_tokens=route.max_tokens,
+                timeout=route.timeout,
+                stream_usage=True,
+                callbacks=[self.llm_usage.callback(node)],
+                **azure_client_kwargs(),
+            )
+            for node, route in self.llm_routes.items()
+        }
+        self.analysis_llm = self.llms["analyze"]
+        self.planning_llm = self.llms["plan"]
+        self.synthesis_llm = self.llms["synthesize"]
+
+        # Default parameters
+        self.default_max_iters = max_iters
+        self.min_iters = max(0, min_iters)
+        self.retrieval_timeout = retrieval_timeout
+        self.evidence_token_budgets = {**DEFAULT_EVIDENCE_TOKEN_BUDGETS, **(evidence_token_budgets or {})}
+        # "full" re-scores all evidence each hop; "incremental" scores only the
+        # new batch against a running summary of findings and gaps
+        if assessment_mode not in ("full", "incremental"):
+            raise ValueError(f"Unknown assessment_mode: {assessment_mode!r}")
+        self.assessment_mode = assessment_mode
+
+        # Two-tier answer cache (exact, then semantic); defaults to ANSWER_CACHE_PATH
+        self.answer_cache = answer_cache if answer_cache is not None else answer_cache_from_env()
 
-        self.vectorstore = PGVector(
+        # Schema-validated output for the JSON nodes; failures are counted per node
+        self.structured_llms = self._build_structured_llms()
+        self.parse_failures: Counter = Counter()
+        self._parse_failures_lock = threading.Lock()
+
+        # State persistence
+        self.checkpointer = MemorySaver()
+
+        # Build the enhanced graph (async nodes; the sync API drives the same graph)
+        self.app = self._build_graph()
+
+        # Threads for blocking lookups (BM25, sync-only stores) off the event loop
+        self.executor = ThreadPoolExecutor(max_workers=retrieval_workers)
+
+    # ------------------------- Construction Helpers ---------------------------
+
+    def _build_vectorstore(self):
+        """Create the sync vector store of `self.backend`."""
+        if self.backend == "neo4j":
+            # optional dependency: only needed for the Neo4j backend
+            from langchain_neo4j import Neo4jVector
+
+            self.neo4j_url = os.environ["NEO4J_URL"]
+            self.neo4j_username = os.environ["NEO4J_USERNAME"]
+            self.neo4j_password = os.environ["NEO4J_PASSWORD"]
+            self.index_name = os.environ["INDEX_NAME"]
+            self.collections = self.index_name
+            return Neo4jVector.from_existing_index(
+                embedding=self.embeddings,
+                url=self.neo4j_url,
+                username=self.neo4j_username,
+                password=self.neo4j_password,
+                index_name=self.index_name,
+            )
+        if self.backend == "mmap":
+            # exported under MMAP_VECTOR_DIR by whichever ingestion script built the collection
+            self.collections = os.getenv("COLLECTION_NAME") or os.environ["INDEX_NAME"]
+            return MmapVectorStore.load(self.collections, self.embeddings)
+
+        self.db_url = os.environ["PGVECTOR_DATABASE_URL"]
+        self.collections = os.environ["COLLECTION_NAME"]
+        return PGVector(
             embeddings=self.embeddings,
             connection=self.db_url,
             collection_name=self.collections,
             use_jsonb=True,
         )
 
-        # Multiple retrievers for different strategies
-        self.semantic_retriever = self.vectorstore.as_retriever(
-            search_type="mmr",
-            search_kwargs={"k": 6, "fetch_k": 24, "lambda_mult": 0.5},
-        )
-        
-        self.similarity_retriever = self.vectorstore.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 8},
+    def _build_async_vectorstore(self):
+        """Create the async vector store of the running event loop."""
+        if self.backend != "pgvector":
+            # Neo4jVector runs its sync driver off the event loop (see `_search`) and
+            # the mmap store is in-process, so the graph reuses the sync store
+            return self.vectorstore
+        return PGVector(
+            embeddings=self.embeddings,
+            connection=self.db_url,
+            collection_name=self.collections,
+            use_jsonb=True,
+            async_mode=True,
         )
 
-        # LLMs for different purposes
-        self.analysis_llm = AzureChatOpenAI(
-            azure_endpoint=self.endpoint,
-            api_key=self.api_key,
-            api_version=self.api_version,
-            deployment_name=self.chat_deployment,
-            temperature=0.0,
-            max_tokens=4096,
-        )
-        
-        self.planning_llm = AzureChatOpenAI(
-            azure_endpoint=self.endpoint,
-            api_key=self.api_key,
-            api_version=self.api_version,
-            deployment_name=self.chat_deployment,
-            temperature=0.2,
-            max_tokens=4096,
-        )
-        
-        self.synthesis_llm = AzureChatOpenAI(
-            azure_endpoint=self.endpoint,
-            api_key=self.api_key,
-            api_version=self.api_version,
-            deployment_name=self.chat_deployment,
-            temperature=0.0,
-            max_tokens=4096,
-        )
+    def _build_batch_search(self):
+        """Multi-query search over the same collection; None where the backend has none."""
+        if self.backend == "mmap":
+            return self.vectorstore
+        if self.backend == "neo4j":
+            return None  # no multi-query statement; vector calls run one by one
+        return PGVectorSearch(self.db_url, self.collections)
 
-        # Default parameters
-        self.default_max_iters = max_iters
-        self.min_iters = max(0, min_iters)
+    def _warn_unused_ann_index(self):
+        """Only batch_search orders by the ANN index; say so when one sits unused."""
+        try:
+            info = recorded_index(self.db_url, self.collections)
+        except Exception as e:
+            print(f"ANN index check skipped: {e}")
+            return
+        if info:
+            print(
+                f"Warning: collection {self.collections!r} has a {info['method']} ANN index, but "
+                "batch_search=False searches by exact scan; pass batch_search=True to use it"
+            )
+
+    @property
+    def async_vectorstore(self):
+        # Built on first use in each event loop; its connections cannot cross loops
+        loop = asyncio.get_running_loop()
+        store = self._async_vectorstores.get(loop)
+        if store is None:
+            store = self._async_vectorstores[loop] = self._build_async_vectorstore()
+        return store
+
+    @property
+    def keyword_enabled(self) -> bool:
+        return "keyword" in self.retriever_configs
+
+    async def _search(self, part: str, query: str, vector: Optional[List[float]] = None) -> ScoredDocs:
+        """Ranked (doc, score) hits of one configured retriever; by `vector` when given."""
+        cfg = self.retriever_configs[part]
+        if cfg["search_type"] == "bm25":
+            # mmap lookups are cheap; keep them off the event loop anyway
+            search = partial(self.keyword_index.search_with_score, query, **cfg["search_kwargs"])
+            return await asyncio.get_running_loop().run_in_executor(self.executor, search)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(query)
+        if cfg["search_type"] == "mmr":
+            try:
+                docs = await self.async_vectorstore.amax_marginal_relevance_search_by_vector(vector, **cfg["search_kwargs"])
+            except NotImplementedError:  # stores with query-only MMR (e.g. Neo4jVector)
+                docs = await self.async_vectorstore.amax_marginal_relevance_search(query, **cfg["search_kwargs"])
+            return [(d, None) for d in docs]
+        store = self.async_vectorstore
+        if hasattr(store, "asimilarity_search_with_score_by_vector"):
+            hits = await store.asimilarity_search_with_score_by_vector(vector, **cfg["search_kwargs"])
+        else:  # sync-only stores (e.g. Neo4jVector): run the sync search off the event loop
+            hits = await asyncio.to_thread(store.similarity_search_with_score_by_vector, vector, **cfg["search_kwargs"])
+        return self._relevance_scores(hits)
+
+    def _relevance_scores(self, hits: ScoredDocs) -> ScoredDocs:
+        # the store's own distance -> relevance mapping, as in similarity_search_with_relevance_scores
+        to_relevance = self.vectorstore._select_relevance_score_fn()
+        return [(doc, to_relevance(score)) for doc, score in hits]
+
+    def _vector_queries(self, calls: List[Tuple[str, str]]) -> List[str]:
+        """Queries of `calls` that search the vector store, in order."""
+        return list(dict.fromkeys(q for q, part in calls if self.retriever_configs[part]["search_type"] != "bm25"))
+
+    async def _embed_queries(self, calls: List[Tuple[str, str]]) -> Dict[str, List[float]]:
+        """One embedding request for every vector query of a hop (empty on failure)."""
+        texts = self._vector_queries(calls)
+        if not texts:
+            return {}
+        try:
+            return dict(zip(texts, await self.embeddings.aembed_documents(texts)))
+        except Exception as e:
+            print(f"Batch query embedding error, embedding per call: {e}")
+            return {}
+
+    def _batch_calls(self, calls: List[Tuple[str, str]], vectors: Dict[str, List[float]]) -> List[Tuple[str, str]]:
+        """Calls the batch search serves: vector retrievers with an embedded query."""
+        if self.batch_search is None:
+            return []
+        return [
+            (query, part) for query, part in calls
+            if query in vectors and self.retriever_configs[part]["search_type"] != "bm25"
+        ]
+
+    def _batch_request(self, calls: List[Tuple[str, str]]) -> Tuple[List[str], int, bool]:
+        """Queries, per-query candidate count and whether MMR needs embeddings."""
+        queries = list(dict.fromkeys(query for query, _ in calls))
+        kwargs = [self.retriever_configs[part]["search_kwargs"] for _, part in calls]
+        k = max(kw.get("fetch_k", kw.get("k", 4)) for kw in kwargs)
+        with_embeddings = any(self.retriever_configs[part]["search_type"] == "mmr" for _, part in calls)
+        return queries, k, with_embeddings
+
+    def _split_batch(
+        self, calls: List[Tuple[str, str]], queries: List[str], candidates, vectors: Dict[str, List[float]]
+    ) -> Dict[Tuple[str, str], ScoredDocs]:
+        """Cut each call's similarity or MMR hits from its query's candidates."""
+        results = {}
+        for query, part in calls:
+            cfg = self.retriever_configs[part]
+            hits = candidates[queries.index(query)]
+            kwargs = cfg["search_kwargs"]
+            if cfg["search_type"] == "mmr":
+                pool = hits[:kwargs.get("fetch_k", 20)]
+                docs = mmr(vectors[query], pool, kwargs.get("k", 4), kwargs.get("lambda_mult", 0.5))
+                results[(query, part)] = [(d, None) for d in docs]
+            else:
+                top = hits[:kwargs.get("k", 4)]
+                results[(query, part)] = self._relevance_scores([(d, dist) for d, dist, _ in top])
+        return results
 
-        # Build the enhanced graph
+    async def _batch_search(
+        self, calls: List[Tuple[str, str]], vectors: Dict[str, List[float]], complexity: Optional[float] = None
+    ):
+        queries, k, with_embeddings = self._batch_request(calls)
+        # complexity widens the ANN search (ef_search / probes) when the collection is indexed
+        candidates = await self.batch_search.asearch([vectors[q] for q in queries], k, with_embeddings, complexity)
+        return self._split_batch(calls, queries, candidates, vectors)
+
+    def _schedule_searches(
+        self, calls: List[Tuple[str, str]], vectors: Dict[str, List[float]], complexity: Optional[float] = None
+    ) -> Dict[Tuple[str, str], asyncio.Future]:
+        """One task per call: batched vector calls share a single SQL statement."""
+        batched = self._batch_calls(calls, vectors)
+        tasks = {
+            call: asyncio.ensure_future(self._search(call[1], call[0], vectors.get(call[0])))
+            for call in calls if call not in batched
+        }
+        if batched:
+            batch = asyncio.ensure_future(self._batch_search(batched, vectors, complexity))
+
+            async def pick(call: Tuple[str, str]) -> ScoredDocs:
+                # shielded: one call's timeout must not cancel the shared statement
+                return (await asyncio.shield(batch))[call]
+
+            tasks.update({call: asyncio.ensure_future(pick(call)) for call in batched})
+        return tasks
+
+    def _build_structured_llms(self) -> Dict[str, Any]:
+        """Per-node structured-output runnables on each node's routed client."""
+        assess_schema = IncrementalAssessment if self.assessment_mode == "incremental" else ContextAssessment
+        schemas = {
+            "analyze": QuestionAnalysis,
+            "plan": QueryPlan,
+            "assess": assess_schema,
+            "decide": Decision,
+            "assess_and_decide": AssessAndDecide,
+            "verify": Verification,
+        }
+        return {
+            node: self.llms[node].with_structured_output(schema, method="function_calling", include_raw=True)
+            for node, schema in schemas.items()
+        }
+
+    async def _structured_call(self, node: str, template: str, inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run a JSON node; one retry on invalid output, then None (callers use defaults)."""
+        chain = ChatPromptTemplate.from_template(template) | self.structured_llms[node]
+        for attempt in (1, 2):
+            output = await chain.ainvoke(inputs)
+            if output["parsed"] is not None:
+                return output["parsed"].model_dump()
+            self._record_parse_failure(node, attempt, output)
+        return None
+
+    def _record_parse_failure(self, node: str, attempt: int, output: Dict[str, Any]):
+        with self._parse_failures_lock:
+            self.parse_failures[node] += 1
+        print(f"Invalid structured output from '{node}' (attempt {attempt}): {output.get('parsing_error')}")
+
+    def _build_graph(self):
+        """Compile the agent loop."""
         graph = StateGraph(EnhancedAgentState)
-        
-        # Add nodes
+
+        # Add nodes (only the assess/decide path of the selected graph mode)
         graph.add_node("analyze_question", self._analyze_question)
         graph.add_node("enhanced_plan", self._enhanced_plan)
         graph.add_node("parallel_retrieve", self._parallel_retrieve)
-        graph.add_node("advanced_assess", self._advanced_assess)
-        graph.add_node("intelligent_decide", self._intelligent_decide)
+        fused = self.graph_mode == "fused"
+        if fused:
+            graph.add_node("assess_and_decide", self._assess_and_decide)
+        else:
+            graph.add_node("advanced_assess", self._advanced_assess)
+            graph.add_node("intelligent_decide", self._intelligent_decide)
         graph.add_node("enhanced_synthesis", self._enhanced_synthesis)
         graph.add_node("advanced_verify", self._advanced_verify)
 
@@ -244,49 +866,82 @@ class EnhancedRAGPipeline:
         graph.set_entry_point("analyze_question")
         graph.add_edge("analyze_question", "enhanced_plan")
         graph.add_edge("enhanced_plan", "parallel_retrieve")
-        graph.add_edge("parallel_retrieve", "advanced_assess")
-        graph.add_edge("advanced_assess", "intelligent_decide")
+        if fused:
+            graph.add_edge("parallel_retrieve", "assess_and_decide")
+            decide_node = "assess_and_decide"
+        else:
+            graph.add_edge("parallel_retrieve", "advanced_assess")
+            graph.add_edge("advanced_assess", "intelligent_decide")
+            decide_node = "intelligent_decide"
 
         # Conditional routing from decide node
         graph.add_conditional_edges(
-            "intelligent_decide",
+            decide_node,
             lambda state: "enhanced_synthesis" if state.get("stop", False) else "enhanced_plan",
         )
 
         graph.add_edge("enhanced_synthesis", "advanced_verify")
         graph.add_edge("advanced_verify", END)
 
-        # State persistence
-        self.checkpointer = MemorySaver()
-        self.app = graph.compile(checkpointer=self.checkpointer)
+        return graph.compile(checkpointer=self.checkpointer)
 
-        # Thread pool for parallel operations
-        self.executor = ThreadPoolExecutor(max_workers=4)
+    def _prompt_evidence(
+        self,
+        state: EnhancedAgentState,
+        node: str,
+        docs: Optional[List[Document]] = None,
+    ) -> List[Document]:
+        """Most relevant evidence (default: all evidence_docs) that fits the token budget of `node`."""
+        query = " ".join(
+            str(part)
+            for part in [state["question"], *state.get("key_aspects", []), *state.get("current_query_batch", [])]
+        )
+        return _select_evidence(
+            state.get("evidence_docs", []) if docs is None else docs,
+            query,
+            self.evidence_token_budgets.get(node),
+            model=self.chat_deployment,
+        )
 
     # --------------------------- Node Implementations ----------------------------
 
-    def _analyze_question(self, state: EnhancedAgentState) -> EnhancedAgentState:
+    async def _analyze_question(self, state: EnhancedAgentState) -> EnhancedAgentState:
         """Analyze question complexity and characteristics."""
         question = state["question"]
-        
-        prompt = ChatPromptTemplate.from_template(QUESTION_ANALYSIS_PROMPT)
-        chain = prompt | self.analysis_llm | StrOutputParser()
-        
-        response = chain.invoke({"question": question})
-        analysis = _safe_json_parse(response, {
+        heuristic = self._heuristic_analysis(question)
+        if heuristic is not None:
+            return heuristic
+
+        result = await self._structured_call("analyze", QUESTION_ANALYSIS_PROMPT, {"question": question})
+        return self._apply_question_analysis(result)
+
+    def _heuristic_analysis(self, question: str) -> Optional[EnhancedAgentState]:
+        """Initial loop state from the heuristic estimator, or None to ask the LLM."""
+        if not self.fast_path:
+            return None
+        analysis = estimate_complexity(question)
+        if analysis is None:
+            return None
+        print(f"Heuristic analysis: {analysis['reasoning']}")
+        return self._analysis_state(analysis)
+
+    def _apply_question_analysis(self, result: Optional[Dict[str, Any]]) -> EnhancedAgentState:
+        """Turn the analysis result into the initial loop state."""
+        return self._analysis_state(_with_defaults(result, {
             "complexity_score": 5.0,
             "question_type": "analytical",
             "estimated_hops": 4,
             "required_evidence_types": ["documents"],
             "key_aspects": ["general"],
             "reasoning": "Default analysis"
-        })
-        
+        }))
+
+    def _analysis_state(self, analysis: Dict[str, Any]) -> EnhancedAgentState:
         # Set dynamic max iterations based on complexity
         complexity = analysis.get("complexity_score", 5.0)
         estimated_hops = analysis.get("estimated_hops", 4)
         max_dynamic = min(self.default_max_iters, max(2, int(complexity * 0.8 + estimated_hops * 0.5)))
-        
+
         return {
             "question_complexity": complexity,
             "question_type": analysis.get("question_type", "analytical"),
@@ -304,102 +959,205 @@ class EnhancedRAGPipeline:
             "evidence_strength": 0.0,
             "information_gaps": [],
             "detected_contradictions": [],
-            "key_findings": []
+            "key_findings": [],
+            # a reused thread_id must not carry the previous question's queue over
+            "sub_questions": [],
+            "pending_sub_questions": [],
+            "planned_gaps": [],
+            "asked_queries": [],
+            "new_evidence": [],
         }
 
-    def _enhanced_plan(self, state: EnhancedAgentState) -> EnhancedAgentState:
+    async def _enhanced_plan(self, state: EnhancedAgentState) -> EnhancedAgentState:
         """Generate multiple focused sub-questions for comprehensive retrieval."""
-        question = state["question"]
+        adopted = self._adopt_speculation(state) or self._queued_plan(state)
+        if adopted is not None:
+            return adopted
+
+        result = await self._structured_call("plan", MULTI_QUERY_PLANNING_PROMPT, self._plan_inputs(state))
+        sub_questions = self._parse_plan(state, result)
+        texts = self._dedupe_texts(state, sub_questions)
+        vectors = await self.embeddings.aembed_documents(texts) if texts else []
+        return self._apply_plan(state, sub_questions, vectors)
+
+    def _queued_plan(self, state: EnhancedAgentState) -> Optional[EnhancedAgentState]:
+        """Next batch from the pending queue, or None when the planner must run."""
+        pending = state.get("pending_sub_questions") or []
+        if not pending:
+            return None
+        if self._gaps_outdated(state):
+            print("Information gaps changed; re-planning")
+            return None
+        batch = [sq["query"] for sq in pending[:3]]
+        print(f"Using queued sub-questions: {batch}")
+        return {
+            "current_query_batch": batch,
+            "pending_sub_questions": pending[3:],
+            "planned_gaps": self._carried_gaps(state),
+            "sub_question": batch[0]  # For compatibility
+        }
+
+    def _gaps_outdated(self, state: EnhancedAgentState) -> bool:
+        """True when the gaps the queue was planned for no longer match the current ones."""
+        planned = state.get("planned_gaps") or []
+        # the first plan runs before any assessment: its queue is checked against later gaps
+        return bool(planned) and _gaps_changed(planned, state.get("information_gaps", []))
+
+    def _carried_gaps(self, state: EnhancedAgentState) -> List[str]:
+        """Gaps a queued batch answers: the planned ones, else those of the first assessment."""
+        return state.get("planned_gaps") or list(state.get("information_gaps", []))
+
+    def _plan_inputs(self, state: EnhancedAgentState) -> Dict[str, Any]:
         analysis = {
             "complexity_score": state.get("question_complexity", 5.0),
             "question_type": state.get("question_type", "analytical"),
             "estimated_hops": state.get("estimated_hops", 4),
             "required_evidence_types": state.get("required_evidence_types", [])
         }
-        
+
         context_hints = "\n".join(f"- {h}" for h in state.get("evidence_hints", [])[-10:]) or "None"
         gaps = "\n".join(f"- {g}" for g in state.get("information_gaps", [])[-5:]) or "None"
-        
-        prompt = ChatPromptTemplate.from_template(MULTI_QUERY_PLANNING_PROMPT)
-        chain = prompt | self.planning_llm | StrOutputParser()
-        
-        response = chain.invoke({
-            "question": question,
+
+        return {
+            "question": state["question"],
             "analysis": json.dumps(analysis),
             "context_hints": context_hints,
             "gaps": gaps
-        })
-        
-        planning_result = _safe_json_parse(response, {
+        }
+
+    def _parse_plan(self, state: EnhancedAgentState, result: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Planner sub-questions with a query, highest priority first."""
+        question = state["question"]
+        planning_result = _with_defaults(result, {
             "sub_questions": [{"query": question, "priority": 1.0, "aspect": "general", "strategy": "semantic"}],
             "reasoning": "Default planning"
         })
-        
-        sub_questions = planning_result.get("sub_questions", [])
+
+        sub_questions = [sq for sq in planning_result.get("sub_questions", []) if sq.get("query")]
         print(sub_questions)
-        # Sort by priority and extract queries for current batch
+        # Sort by priority
         sub_questions.sort(key=lambda x: x.get("priority", 0.5), reverse=True)
-        current_batch = [sq["query"] for sq in sub_questions[:3]]  # Top 3 queries
-        
+        return sub_questions
+
+    def _dedupe_texts(self, state: EnhancedAgentState, sub_questions: List[Dict[str, Any]]) -> List[str]:
+        """Asked queries followed by the new sub-questions: the texts embedded for dedupe."""
+        if self.query_dedupe_threshold is None or not sub_questions:
+            return []
+        return list(state.get("asked_queries", [])) + [sq["query"] for sq in sub_questions]
+
+    def _apply_plan(
+        self,
+        state: EnhancedAgentState,
+        sub_questions: List[Dict[str, Any]],
+        vectors: List[List[float]],
+    ) -> EnhancedAgentState:
+        question = state["question"]
+        fresh = _drop_similar_queries(
+            sub_questions, state.get("asked_queries", []), vectors, self.query_dedupe_threshold
+        )
+        if len(fresh) < len(sub_questions):
+            print(f"Dropped {len(sub_questions) - len(fresh)} already-asked sub-question(s)")
+        # Nothing new to ask: fall back to the planner's top pick
+        fresh = fresh or sub_questions[:1]
+
+        # Top 3 queries run now; the rest wait in the queue for later hops
+        current_batch = [sq["query"] for sq in fresh[:3]]
+
         # For compatibility, set sub_question to the highest priority query
         sub_question = current_batch[0] if current_batch else question
-        
+
         return {
             "sub_questions": sub_questions,
             "current_query_batch": current_batch,
+            "pending_sub_questions": fresh[3:],
+            "planned_gaps": list(state.get("information_gaps", [])),
             "sub_question": sub_question  # For compatibility
         }
 
-    def _parallel_retrieve(self, state: EnhancedAgentState) -> EnhancedAgentState:
+    async def _parallel_retrieve(self, state: EnhancedAgentState) -> EnhancedAgentState:
         """Execute parallel retrieval using multiple strategies."""
-        queries = state.get("current_query_batch", [state.get("sub_question", state["question"])])
-        
-        def retrieve_with_strategy(query: str, strategy: str) -> List[Document]:
-            """Retrieve documents using specified strategy."""
+        queries, strategies = self._retrieval_plan(state)
+
+        # Fan out every (query, retriever) call at once as tasks,
+        # reusing calls a speculative prefetch already started
+        calls = _retrieval_calls(queries, strategies, self.keyword_enabled)
+        prefetched = self._take_prefetched(state, calls)
+        # one embedding request per hop; MMR and similarity search by the same vector
+        vectors = await self._embed_queries([call for call in calls if call not in prefetched])
+        complexity = state.get("question_complexity")
+        pending = {
+            **prefetched,
+            **self._schedule_searches([c for c in calls if c not in prefetched], vectors, complexity),
+        }
+
+        async def run(query: str, part: str) -> ScoredDocs:
             try:
-                if strategy == "semantic":
-                    return self.semantic_retriever.invoke(query)
-                elif strategy == "similarity":
-                    return self.similarity_retriever.invoke(query)
-                else:  # hybrid - combine both
-                    semantic_docs = self.semantic_retriever.invoke(query)
-                    similarity_docs = self.similarity_retriever.invoke(query)
-                    return _dedupe_docs(semantic_docs + similarity_docs)
+                return await asyncio.wait_for(pending[(query, part)], self.retrieval_timeout)
+            except asyncio.TimeoutError:
+                print(f"Retrieval timeout for query '{query}' with retriever '{part}'")
             except Exception as e:
-                print(f"Retrieval error for query '{query}' with strategy '{strategy}': {e}")
-                return []
-        
-        # Execute parallel retrieval
+                print(f"Retrieval error for query '{query}' with retriever '{part}': {e}")
+            return []
+
+        docs = await asyncio.gather(*(run(query, part) for query, part in calls))
+        update = self._merge_retrieval(state, queries, strategies, dict(zip(calls, docs)))
+
+        speculation = self._speculation_plan(state, queries)
+        if speculation is not None:
+            spec_queries, spec_strategies = speculation
+            spec_calls = _retrieval_calls(spec_queries, spec_strategies, self.keyword_enabled)
+            spec_vectors = await self._embed_queries(spec_calls)
+            self._store_speculation(state, spec_queries, self._schedule_searches(spec_calls, spec_vectors, complexity))
+        return update
+
+    def _retrieval_plan(self, state: EnhancedAgentState) -> Tuple[List[str], Dict[str, str]]:
+        """Queries of this hop and the strategy chosen for each."""
+        queries = state.get("current_query_batch", [state.get("sub_question", state["question"])])
+
+        # Determine strategy per query based on sub_questions info or default to semantic
+        strategies = {}
+        for sq in state.get("sub_questions", []) or []:
+            strategies.setdefault(sq.get("query"), sq.get("strategy", "semantic"))
+        strategies = {query: strategies.get(query, "semantic") for query in queries}
+
+        for query in queries:
+            print(f"Running retrieval for Query: '{query}' | Strategy: '{strategies[query]}'")
+        return queries, strategies
+
+    def _merge_retrieval(
+        self,
+        state: EnhancedAgentState,
+        queries: List[str],
+        strategies: Dict[str, str],
+        results: Dict[Tuple[str, str], ScoredDocs],
+    ) -> EnhancedAgentState:
+        """Fuse per-call rankings per query and across the hop, then update evidence."""
         parallel_results = {}
-        all_docs = []
-        
+        hop_lists = []
+
         for query in queries:
-            # Determine strategy based on sub_questions info or default to semantic
-            strategy = "semantic"  # Default strategy
-            if state.get("sub_questions"):
-                for sq in state.get("sub_questions", []):
-                    if sq.get("query") == query:
-                        strategy = sq.get("strategy", "semantic")
-                        break
-            
-            print(f"Running retrieval for Query: '{query}' | Strategy: '{strategy}'")
-
-            docs = retrieve_with_strategy(query, strategy)
+            strategy = strategies[query]
+            ranked_lists = [
+                (part, results.get((query, part), []))
+                for part in _strategy_parts(strategy, self.keyword_enabled)
+            ]
+            docs = _fuse_results(ranked_lists, self.fusion, self.fusion_weights)
 
             print(f"Results for Query: '{query}' | Strategy: '{strategy}'")
             print(docs)
 
             parallel_results[f"{query}_{strategy}"] = docs
+            hop_lists.extend(ranked_lists)
+
+        # One ranking over every (query, retriever) list: docs found by several
+        # queries or retrievers rise, and only the best `fusion_top_k` are kept
+        fused_docs = _fuse_results(hop_lists, self.fusion, self.fusion_weights, self.fusion_top_k)
+        fused_docs = _dedupe_docs(fused_docs, self.near_duplicate_bits)
 
-            all_docs.extend(docs)
-        
-        # Fuse and deduplicate results
-        fused_docs = _dedupe_docs(all_docs)
-        
         # Update evidence docs
         existing_evidence = state.get("evidence_docs", [])
-        updated_evidence = _dedupe_docs(existing_evidence + fused_docs)
-        
+        updated_evidence = _dedupe_docs(existing_evidence + fused_docs, self.near_duplicate_bits)
+
         # Generate hints from new documents
         new_hints = []
         for d in fused_docs:
@@ -407,48 +1165,67 @@ class EnhancedRAGPipeline:
             page = d.metadata.get("page", "?")
             title = (d.page_content or "").splitlines()[0][:120] if d.page_content else "No content"
             new_hints.append(f"{src} p.{page}: {title}")
-        
+
         existing_hints = state.get("evidence_hints", [])
         updated_hints = (existing_hints + new_hints)[-50:]  # Keep last 50 hints
-        
+
         return {
             "parallel_results": parallel_results,
             "fused_results": fused_docs,
+            "new_evidence": updated_evidence[len(existing_evidence):],
+            "asked_queries": _merge_unique(state.get("asked_queries", []), queries),
             "last_batch": fused_docs,  # For compatibility
             "evidence_docs": updated_evidence,
             "evidence_hints": updated_hints
         }
 
-    def _advanced_assess(self, state: EnhancedAgentState) -> EnhancedAgentState:
+    async def _advanced_assess(self, state: EnhancedAgentState) -> EnhancedAgentState:
         """Perform comprehensive assessment of context quality and completeness."""
-        question = state["question"]
-        evidence_docs = state.get("evidence_docs", [])
-        evidence_count = len(evidence_docs)
-        
-        if not evidence_docs:
+        shortcut = self._assess_shortcut(state)
+        if shortcut is not None:
+            return shortcut
+
+        result = await self._structured_call("assess", self._assess_template(), self._assess_inputs(state))
+        return self._apply_assessment(state, result)
+
+    def _assess_shortcut(self, state: EnhancedAgentState) -> Optional[EnhancedAgentState]:
+        """State update when no assessment call is needed, else None."""
+        if not state.get("evidence_docs"):
+            return _empty_assessment()
+        if self.assessment_mode == "incremental" and not state.get("new_evidence"):
+            # Nothing new to score: carry the running assessment forward
+            improvements = list(state.get("recent_quality_improvements", [])) + [0.0]
+            return {"recent_quality_improvements": improvements[-3:]}
+        return None
+
+    def _assess_template(self) -> str:
+        if self.assessment_mode == "incremental":
+            return INCREMENTAL_ASSESSMENT_PROMPT
+        return CONTEXT_ASSESSMENT_PROMPT
+
+    def _assess_inputs(self, state: EnhancedAgentState) -> Dict[str, Any]:
+        if self.assessment_mode == "incremental":
+            new_docs = self._prompt_evidence(state, "assess", state.get("new_evidence", []))
             return {
-                "context_quality_score": 0.0,
-                "coverage_score": 0.0,
-                "evidence_strength": 0.0,
-                "information_gaps": ["No relevant documents found"],
-                "detected_contradictions": [],
-                "sufficiency_assessment": "insufficient",
-                "key_findings": [],
-                "gaps": ["No relevant documents found"]  # For compatibility
+                "question": state["question"],
+                "previous_quality": state.get("context_quality_score", 0.0),
+                "previous_coverage": state.get("coverage_score", 0.0),
+                "previous_strength": state.get("evidence_strength", 0.0),
+                "key_findings": _bullets(state.get("key_findings", []), 15),
+                "information_gaps": _bullets(state.get("information_gaps", []), 10),
+                "evidence_count": len(state.get("evidence_docs", [])),
+                "context": _format_docs(new_docs),
             }
-        
-        context = _format_docs(evidence_docs)
-        
-        prompt = ChatPromptTemplate.from_template(CONTEXT_ASSESSMENT_PROMPT)
-        chain = prompt | self.analysis_llm | StrOutputParser()
-        
-        response = chain.invoke({
-            "question": question,
-            "context": context,
-            "evidence_count": evidence_count
-        })
-        
-        assessment = _safe_json_parse(response, {
+
+        evidence_docs = self._prompt_evidence(state, "assess")
+        return {
+            "question": state["question"],
+            "context": _format_docs(evidence_docs),
+            "evidence_count": len(evidence_docs)
+        }
+
+    def _apply_assessment(self, state: EnhancedAgentState, result: Optional[Dict[str, Any]]) -> EnhancedAgentState:
+        return self._assessment_state(state, _with_defaults(result, {
             "quality_score": 0.5,
             "coverage_score": 0.5,
             "evidence_strength": 0.5,
@@ -457,35 +1234,66 @@ class EnhancedRAGPipeline:
             "sufficiency_assessment": "partial",
             "key_findings": [],
             "reasoning": "Default assessment"
-        })
-        
+        }))
+
+    def _assessment_state(self, state: EnhancedAgentState, assessment: Dict[str, Any]) -> EnhancedAgentState:
         # Track quality improvements
         previous_quality = state.get("context_quality_score", 0.0)
         current_quality = assessment.get("quality_score", 0.5)
         quality_improvement = current_quality - previous_quality
-        
-        recent_improvements = state.get("recent_quality_improvements", [])
+
+        recent_improvements = list(state.get("recent_quality_improvements", []))
         recent_improvements.append(quality_improvement)
         recent_improvements = recent_improvements[-3:]  # Keep last 3 improvements
-        
+
+        if self.assessment_mode == "incremental":
+            # Merge new findings/contradictions into the running summary
+            key_findings = _merge_unique(state.get("key_findings", []), assessment.get("new_findings", []))[-20:]
+            contradictions = _merge_unique(state.get("detected_contradictions", []), assessment.get("contradictions", []))
+        else:
+            key_findings = assessment.get("key_findings", [])
+            contradictions = assessment.get("contradictions", [])
+
         return {
             "context_quality_score": current_quality,
             "coverage_score": assessment.get("coverage_score", 0.5),
             "evidence_strength": assessment.get("evidence_strength", 0.5),
             "information_gaps": assessment.get("information_gaps", []),
-            "detected_contradictions": assessment.get("contradictions", []),
+            "detected_contradictions": contradictions,
             "sufficiency_assessment": assessment.get("sufficiency_assessment", "partial"),
-            "key_findings": assessment.get("key_findings", []),
+            "key_findings": key_findings,
             "recent_quality_improvements": recent_improvements,
             "gaps": assessment.get("information_gaps", [])  # For compatibility
         }
 
-    def _intelligent_decide(self, state: EnhancedAgentState) -> EnhancedAgentState:
+    async def _intelligent_decide(self, state: EnhancedAgentState) -> EnhancedAgentState:
         """Make intelligent decision about continuing or stopping retrieval."""
-        iteration = state.get("iteration", 0)
-        max_iters = state.get("max_dynamic_iters", self.default_max_iters)
-        complexity = state.get("question_complexity", 5.0)
-        
+        ruled = self._rule_decision(state)
+        if ruled is not None:
+            return ruled
+
+        result = await self._structured_call("decide", DECISION_MAKING_PROMPT, self._decision_inputs(state))
+        return self._apply_decision(state, result)
+
+    def _rule_decision(self, state: EnhancedAgentState) -> Optional[EnhancedAgentState]:
+        """Decision from the numeric stop rules, or None when the LLM has to decide."""
+        if not self.fast_path:
+            return None
+        decision = rule_based_decision(
+            quality=state.get("context_quality_score", 0.0),
+            coverage=state.get("coverage_score", 0.0),
+            improvements=state.get("recent_quality_improvements", []),
+            iteration=state.get("iteration", 0),
+            max_iters=state.get("max_dynamic_iters", self.default_max_iters),
+            min_iters=self.min_iters,
+            new_evidence=len(state.get("new_evidence", [])),
+        )
+        if decision is None:
+            return None
+        print(f"Rule-based decision: {decision['decision']} ({decision['reasoning']})")
+        return self._decision_state(state, decision, source="rules")
+
+    def _decision_inputs(self, state: EnhancedAgentState) -> Dict[str, Any]:
         # Gather assessment data
         assessment = {
             "quality_score": state.get("context_quality_score", 0.0),
@@ -495,116 +1303,188 @@ class EnhancedRAGPipeline:
             "information_gaps": state.get("information_gaps", []),
             "recent_improvements": state.get("recent_quality_improvements", [])
         }
-        
+
         # Check recent retrieval success
         last_batch_size = len(state.get("last_batch", []))
         recent_success = "successful" if last_batch_size > 0 else "unsuccessful"
-        
-        prompt = ChatPromptTemplate.from_template(DECISION_MAKING_PROMPT)
-        chain = prompt | self.analysis_llm | StrOutputParser()
-        
-        response = chain.invoke({
+
+        return {
             "question": state["question"],
-            "iteration": iteration + 1,
-            "max_iterations": max_iters,
+            "iteration": state.get("iteration", 0) + 1,
+            "max_iterations": state.get("max_dynamic_iters", self.default_max_iters),
             "assessment": json.dumps(assessment),
             "recent_success": recent_success,
-            "complexity": complexity
-        })
-        
-        decision_result = _safe_json_parse(response, {
+            "complexity": state.get("question_complexity", 5.0)
+        }
+
+    def _apply_decision(self, state: EnhancedAgentState, result: Optional[Dict[str, Any]]) -> EnhancedAgentState:
+        return self._decision_state(state, _with_defaults(result, {
             "decision": "continue",
             "confidence": 0.5,
             "reasoning": "Default decision",
             "stop_reasons": [],
             "continue_strategy": "general search",
             "estimated_remaining_hops": 2
-        })
-        
+        }), source="llm")
+
+    def _decision_state(
+        self, state: EnhancedAgentState, decision_result: Dict[str, Any], source: str
+    ) -> EnhancedAgentState:
+        iteration = state.get("iteration", 0)
+        max_iters = state.get("max_dynamic_iters", self.default_max_iters)
+        complexity = state.get("question_complexity", 5.0)
+
         should_stop = decision_result.get("decision", "continue").lower() == "stop"
-        
+
         # Additional safety checks
         if iteration + 1 >= max_iters:
             should_stop = True
-            decision_result["stop_reasons"].append("Reached maximum iterations")
-        
+            stop_reasons = decision_result.setdefault("stop_reasons", [])
+            if "Reached maximum iterations" not in stop_reasons:
+                stop_reasons.append("Reached maximum iterations")
+
         # Minimum iterations check
         if iteration + 1 < self.min_iters:
             should_stop = False
-        
+
+        if should_stop:
+            self._discard_speculation(state.get("run_id"))
+
         return {
             "stop": should_stop,
             "iteration": iteration + 1,
             "decision_factors": {
-                "quality_score": assessment["quality_score"],
-                "coverage_score": assessment["coverage_score"],
+                "quality_score": state.get("context_quality_score", 0.0),
+                "coverage_score": state.get("coverage_score", 0.0),
                 "iteration_ratio": (iteration + 1) / max_iters,
                 "complexity_factor": complexity / 10.0
             },
             "continue_probability": decision_result.get("confidence", 0.5),
-            "stop_reasons": decision_result.get("stop_reasons", [])
+            "stop_reasons": decision_result.get("stop_reasons", []),
+            "decision_source": source
+        }
+
+    async def _assess_and_decide(self, state: EnhancedAgentState) -> EnhancedAgentState:
+        """Assess the context and decide continue/stop in one LLM call ("fused" graph mode)."""
+        shortcut = self._assess_shortcut(state)
+        if shortcut is not None:
+            return {**shortcut, **await self._intelligent_decide({**state, **shortcut})}
+
+        result = await self._structured_call("assess_and_decide", ASSESS_AND_DECIDE_PROMPT, self._assess_and_decide_inputs(state))
+        return self._apply_assess_and_decide(state, result)
+
+    def _assess_and_decide_inputs(self, state: EnhancedAgentState) -> Dict[str, Any]:
+        inputs = self._decision_inputs(state)
+        if self.assessment_mode == "incremental":
+            docs = self._prompt_evidence(state, "assess", state.get("new_evidence", []))
+            scope = "only the evidence retrieved in this hop; the previous findings summarize the rest"
+        else:
+            docs = self._prompt_evidence(state, "assess")
+            scope = "all evidence gathered so far"
+        return {
+            "question": inputs["question"],
+            "complexity": inputs["complexity"],
+            "iteration": inputs["iteration"],
+            "max_iterations": inputs["max_iterations"],
+            "recent_improvements": state.get("recent_quality_improvements", []),
+            "previous_quality": state.get("context_quality_score", 0.0),
+            "previous_coverage": state.get("coverage_score", 0.0),
+            "key_findings": _bullets(state.get("key_findings", []), 15),
+            "information_gaps": _bullets(state.get("information_gaps", []), 10),
+            "evidence_count": len(state.get("evidence_docs", [])),
+            "context_scope": scope,
+            "context": _format_docs(docs),
         }
 
-    def _enhanced_synthesis(self, state: EnhancedAgentState) -> EnhancedAgentState:
+    def _apply_assess_and_decide(
+        self, state: EnhancedAgentState, result: Optional[Dict[str, Any]]
+    ) -> EnhancedAgentState:
+        result = _with_defaults(result, {
+            "quality_score": 0.5,
+            "coverage_score": 0.5,
+            "evidence_strength": 0.5,
+            "information_gaps": ["Assessment failed"],
+            "contradictions": [],
+            "sufficiency_assessment": "partial",
+            "key_findings": [],
+            "decision": "continue",
+            "confidence": 0.5,
+            "stop_reasons": [],
+            "continue_strategy": "general search",
+            "estimated_remaining_hops": 2,
+            "reasoning": "Default assessment and decision"
+        })
+        if self.assessment_mode == "incremental":
+            result.setdefault("new_findings", result.get("key_findings", []))
+
+        update = self._assessment_state(state, result)
+        # The decision guards (and fast-path rules) see the fresh assessment
+        assessed = {**state, **update}
+        decision = self._rule_decision(assessed) or self._decision_state(assessed, result, source="llm")
+        return {**update, **decision}
+
+    async def _enhanced_synthesis(self, state: EnhancedAgentState) -> EnhancedAgentState:
         """Generate comprehensive answer using enhanced synthesis."""
-        question = state["question"]
-        evidence_docs = state.get("evidence_docs", [])
-        
-        if not evidence_docs:
-            return {
-                "final_answer": "I couldn't find any relevant evidence in the knowledge base for this query.",
-                "answer_confidence": 0.0
-            }
-        
-        context = _format_docs(evidence_docs)
-        quality_score = state.get("context_quality_score", 0.5)
-        coverage_score = state.get("coverage_score", 0.5)
-        evidence_strength = state.get("evidence_strength", 0.5)
-        
+        inputs = self._synthesis_inputs(state)
+        if inputs is None:
+            return _no_evidence_answer()
+
         prompt = ChatPromptTemplate.from_template(ENHANCED_SYNTHESIS_PROMPT)
         chain = prompt | self.synthesis_llm | StrOutputParser()
-        
-        answer = chain.invoke({
-            "question": question,
-            "context": context,
-            "quality_score": quality_score,
-            "coverage_score": coverage_score,
-            "evidence_strength": evidence_strength
-        })
-        
+
+        answer = await chain.ainvoke(inputs)
+        return self._apply_synthesis(inputs, answer)
+
+    def _synthesis_inputs(self, state: EnhancedAgentState) -> Optional[Dict[str, Any]]:
+        """Prompt inputs for synthesis, or None when there is no evidence."""
+        if not state.get("evidence_docs"):
+            return None
+        return {
+            "question": state["question"],
+            "context": _format_docs(self._prompt_evidence(state, "synthesis")),
+            "quality_score": state.get("context_quality_score", 0.5),
+            "coverage_score": state.get("coverage_score", 0.5),
+            "evidence_strength": state.get("evidence_strength", 0.5)
+        }
+
+    def _apply_synthesis(self, inputs: Dict[str, Any], answer: str) -> EnhancedAgentState:
         # Calculate answer confidence based on context quality
-        confidence = (quality_score * 0.4 + coverage_score * 0.4 + evidence_strength * 0.2)
-        
+        confidence = (
+            inputs["quality_score"] * 0.4 + inputs["coverage_score"] * 0.4 + inputs["evidence_strength"] * 0.2
+        )
+
         return {
             "final_answer": answer.strip(),
             "answer_confidence": confidence
         }
 
-    def _advanced_verify(self, state: EnhancedAgentState) -> EnhancedAgentState:
+    async def _advanced_verify(self, state: EnhancedAgentState) -> EnhancedAgentState:
         """Perform comprehensive answer verification."""
-        question = state["question"]
-        answer = state.get("final_answer", "")
-        evidence_docs = state.get("evidence_docs", [])
-        
-        if not evidence_docs or not answer:
+        inputs = self._verify_inputs(state)
+        if inputs is None:
             return {"grounded_ok": False}
-        
-        context = _format_docs(evidence_docs)
-        
-        prompt = ChatPromptTemplate.from_template(ADVANCED_VERIFICATION_PROMPT)
-        chain = prompt | self.analysis_llm | StrOutputParser()
-        
-        response = chain.invoke({
-            "question": question,
+
+        result = await self._structured_call("verify", ADVANCED_VERIFICATION_PROMPT, inputs)
+        return self._apply_verification(result)
+
+    def _verify_inputs(self, state: EnhancedAgentState) -> Optional[Dict[str, Any]]:
+        """Prompt inputs for verification, or None when there is nothing to verify."""
+        answer = state.get("final_answer", "")
+        if not state.get("evidence_docs") or not answer:
+            return None
+        return {
+            "question": state["question"],
             "answer": answer,
-            "context": context,
+            "context": _format_docs(self._prompt_evidence(state, "verify")),
             # "system_prompt":SYSTEM_PROMPT,
-        })
+        }
+
+    def _apply_verification(self, result: Optional[Dict[str, Any]]) -> EnhancedAgentState:
         print("************************************************************************************************")
-        print("response :::: ",response)
+        print("response :::: ",result)
         print("************************************************************************************************")
 
-        verification = _safe_json_parse(response, {
+        verification = _with_defaults(result, {
             "overall_grounding": "fail",
             "factual_grounding": 0.5,
             "logical_consistency": 0.5,
@@ -615,28 +1495,83 @@ class EnhancedRAGPipeline:
             "recommendations": [],
             "final_assessment": "needs_improvement"
         })
-        
+
         grounded_ok = verification.get("overall_grounding", "fail").lower() == "pass"
-        
+
         return {"grounded_ok": grounded_ok}
 
-    # ------------------------- Public API ---------------------------
+    # ------------------------- Speculative Prefetch ---------------------------
 
-    def ask(
-        self,
-        question: str,
-        max_iters: Optional[int] = None,
-        thread_id: Optional[str] = None
-    ) -> Tuple[str, Dict[str, Any]]:
-        """Execute the enhanced pipeline and return answer with debug info."""
-        mi = max_iters if max_iters is not None else self.default_max_iters
-        init: EnhancedAgentState = {
-            "question": question,
+    def _speculation_plan(
+        self, state: EnhancedAgentState, queries: List[str]
+    ) -> Optional[Tuple[List[str], Dict[str, str]]]:
+        """Next queued sub-questions (and strategies) to prefetch, if any."""
+        if not self.speculative_prefetch or not state.get("run_id"):
+            return None
+        asked = set(state.get("asked_queries", [])) | set(queries)
+        leftovers = [sq for sq in state.get("pending_sub_questions", []) or [] if sq["query"] not in asked][:3]
+        if not leftovers:
+            return None
+        return [sq["query"] for sq in leftovers], {sq["query"]: sq.get("strategy", "semantic") for sq in leftovers}
+
+    def _store_speculation(self, state: EnhancedAgentState, queries: List[str], futures: Dict[Tuple[str, str], Any]):
+        print(f"Speculatively prefetching: {queries}")
+        with self._speculation_lock:
+            previous = self._speculations.pop(state["run_id"], None)
+            self._speculations[state["run_id"]] = {"queries": queries, "futures": futures}
+        if previous:
+            for future in previous["futures"].values():
+                future.cancel()
+
+    def _adopt_speculation(self, state: EnhancedAgentState) -> Optional[EnhancedAgentState]:
+        """Use a pending prefetch as this hop's batch instead of re-planning."""
+        with self._speculation_lock:
+            speculation = self._speculations.get(state.get("run_id"))
+        if speculation is None:
+            return None
+        # same re-plan rule as the queue: the prefetch came from the old plan
+        if self._gaps_outdated(state):
+            print("Information gaps changed; discarding speculative batch")
+            self._discard_speculation(state.get("run_id"))
+            return None
+        print(f"Adopting speculative batch: {speculation['queries']}")
+        pending = state.get("pending_sub_questions") or []
+        return {
+            "current_query_batch": speculation["queries"],
+            "pending_sub_questions": [sq for sq in pending if sq["query"] not in speculation["queries"]],
+            "planned_gaps": self._carried_gaps(state),
+            "sub_question": speculation["queries"][0]  # For compatibility
         }
-        
+
+    def _take_prefetched(self, state: EnhancedAgentState, calls: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Any]:
+        """Pop the run's prefetch; futures of calls this hop does not need are cancelled."""
+        with self._speculation_lock:
+            speculation = self._speculations.pop(state.get("run_id"), None)
+        if speculation is None:
+            return {}
+        for call, future in speculation["futures"].items():
+            if call not in calls:
+                future.cancel()
+        return {call: future for call, future in speculation["futures"].items() if call in calls}
+
+    def _discard_speculation(self, run_id: Optional[str]):
+        with self._speculation_lock:
+            speculation = self._speculations.pop(run_id, None)
+        if speculation:
+            for future in speculation["futures"].values():
+                future.cancel()
+
+    # ------------------------- Public API ---------------------------
+
+    def _run_config(self, thread_id: Optional[str]) -> Dict[str, Any]:
         tid = thread_id or f"enhanced-rag-{uuid4().hex}"
-        final_state = self.app.invoke(init, config={"configurable": {"thread_id": tid}})
-        
+        return {"configurable": {"thread_id": tid}}
+
+    def _init_state(self, question: str) -> EnhancedAgentState:
+        return {"question": question, "run_id": uuid4().hex}
+
+    def _result(self, final_state: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Extract the answer and debug info from a finished run."""
         answer = final_state.get("final_answer", "")
         print("************************************************************************************************")
         print("FINAL_ANSWER :::: ",answer)
@@ -651,46 +1586,115 @@ class EnhancedRAGPipeline:
             "coverage_score": final_state.get("coverage_score", 0.0),
             "answer_confidence": final_state.get("answer_confidence", 0.0),
             "stop_reasons": final_state.get("stop_reasons", []),
+            "decision_source": final_state.get("decision_source"),
+            "parse_failures": dict(self.parse_failures),
+            "llm_usage": self.llm_usage.stats(),
+            "azure_requests": client_pool_stats(),
             "last_gaps": final_state.get("information_gaps", [])[-3:],
             "last_sub_question": final_state.get("sub_question", "")
         }
-        
+
+        return answer, debug
+
+    def _cache_hit(self, entry: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        print(f"ANSWER_CACHE :::: {entry['tier']} hit ({entry['similarity']:.3f}) for '{entry['question']}'")
+        debug = {
+            **entry["debug"],
+            "cache": entry["tier"],
+            "cache_similarity": entry["similarity"],
+            "cached_question": entry["question"],
+            "evidence_ids": entry["evidence_ids"],
+        }
+        return entry["answer"], debug
+
+    def _cache_answer(
+        self,
+        question: str,
+        vector: Optional[List[float]],
+        final_state: Dict[str, Any],
+        answer: str,
+        debug: Dict[str, Any],
+    ):
+        """Store a finished answer; ungrounded or evidence-free answers are not cached."""
+        evidence_docs = final_state.get("evidence_docs") or []
+        if self.answer_cache is None or not answer or not evidence_docs or final_state.get("grounded_ok") is False:
+            return
+        evidence_ids = [
+            d.metadata.get("chunk_id") or f"{d.metadata.get('source')}:{d.metadata.get('page')}"
+            for d in evidence_docs
+        ]
+        self.answer_cache.put(self.collections, question, answer, debug, evidence_ids, vector)
+
+    async def aask(
+        self,
+        question: str,
+        max_iters: Optional[int] = None,
+        thread_id: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Execute the enhanced pipeline and return answer with debug info."""
+        vector = None
+        if self.answer_cache is not None:
+            # SQLite lookups run in a thread so they never block the event loop
+            entry = await asyncio.to_thread(self.answer_cache.get_exact, self.collections, question)
+            if entry is None:
+                vector = await self.embeddings.aembed_query(question)
+                entry = await asyncio.to_thread(self.answer_cache.get_similar, self.collections, vector)
+            if entry is not None:
+                return self._cache_hit(entry)
+
+        init = self._init_state(question)
+        try:
+            final_state = await self.app.ainvoke(init, config=self._run_config(thread_id))
+        finally:
+            self._discard_speculation(init["run_id"])
+        answer, debug = self._result(final_state)
+        await asyncio.to_thread(self._cache_answer, question, vector, final_state, answer, debug)
         return answer, debug
 
+    def ask(
+        self,
+        question: str,
+        max_iters: Optional[int] = None,
+        thread_id: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Sync `aask`, run on the background event loop."""
+        return _run_sync(self.aask(question, max_iters, thread_id))
+
+    async def astream(
+        self,
+        question: str,
+        max_iters: Optional[int] = None,
+        thread_id: Optional[str] = None
+    ):
+        """Stream per-node events during execution for real-time UIs.
+
+        Yields {"node", "update"} with each node's state delta, {"node":
+        "enhanced_synthesis", "token"} for answer tokens as they are generated,
+        and finally {"node": "__final__", "state"} read from the checkpointer.
+        """
+        init = self._init_state(question)
+        config = self._run_config(thread_id)
+
+        try:
+            async for mode, chunk in self.app.astream(init, config=config, stream_mode=["updates", "messages"]):
+                event = _stream_event(mode, chunk)
+                if event:
+                    yield event
+        finally:
+            self._discard_speculation(init["run_id"])
+
+        # The checkpointer already holds the final state; no second run needed
+        snapshot = await self.app.aget_state(config)
+        yield {"node": "__final__", "state": snapshot.values}
+
     def stream(
         self,
         question: str,
         max_iters: Optional[int] = None,
         thread_id: Optional[str] = None
     ):
-        """Stream per-node events during execution for real-time UIs."""
-        mi = max_iters if max_iters is not None else self.default_max_iters
-        init: EnhancedAgentState = {"question": question}
-        
-        tid = thread_id or f"enhanced-rag-{uuid4().hex}"
-        
-        for ev in self.app.stream(
-            init,
-            config={"configurable": {"thread_id": tid}},
-            stream_mode="updates",
-        ):
-            if not isinstance(ev, dict) or not ev:
-                continue
-            
-            node, payload = next(iter(ev.items()))
-            if not isinstance(payload, dict):
-                yield {"node": node, "raw": payload}
-                continue
-            
-            yield {
-                "node": node,
-                "input": payload.get("input"),
-                "output": payload.get("output"),
-            }
-        
-        # Get final state
-        final_state = self.app.invoke(init, config={"configurable": {"thread_id": tid}})
-        yield {"node": "__final__", "state": final_state}
+        """Sync `astream` with the same events."""
+        yield from _iter_sync(self.astream(question, max_iters, thread_id))
 
 
 # Alias for backward compatibility
@@ -93,6 +93,101 @@ Sufficiency levels:
 - comprehensive: Can provide complete, well-supported answer
 """
 
+# Incremental Context Assessment Prompt (scores only newly retrieved evidence)
+INCREMENTAL_ASSESSMENT_PROMPT = """You are an expert context evaluator. Update a running assessment of the retrieved context using newly retrieved evidence.
+
+Question: {question}
+
+Previous Assessment (of all evidence before this hop):
+- Quality Score: {previous_quality}
+- Coverage Score: {previous_coverage}
+- Evidence Strength: {previous_strength}
+- Key Findings So Far:
+{key_findings}
+- Open Information Gaps:
+{information_gaps}
+
+Total Evidence Count: {evidence_count}
+Newly Retrieved Context:
+{context}
+
+Evaluate how the new context changes the assessment. Scores must describe ALL evidence gathered so far (previous findings + new context), not the new context alone. Drop gaps that the new context closes and keep the ones that remain open.
+
+Provide your assessment in JSON format:
+{{
+    "quality_score": <float 0-1>,
+    "coverage_score": <float 0-1>,
+    "evidence_strength": <float 0-1>,
+    "information_gaps": ["<remaining gap1>", "<remaining gap2>"],
+    "contradictions": ["<contradiction1>"],
+    "sufficiency_assessment": "<insufficient|partial|sufficient|comprehensive>",
+    "new_findings": ["<finding from the new context1>", "<finding2>"],
+    "reasoning": "<brief explanation>"
+}}
+
+Scoring guidelines:
+- quality_score: Relevance and accuracy of information (0=irrelevant, 1=highly relevant)
+- coverage_score: How well the evidence covers question aspects (0=no coverage, 1=complete coverage)
+- evidence_strength: Reliability and authority of sources (0=weak, 1=strong)
+"""
+
+# Fused Assessment + Decision Prompt (one call per hop instead of two)
+ASSESS_AND_DECIDE_PROMPT = """You are an expert context evaluator and decision maker for RAG systems. Assess the retrieved context for answering the question, then decide whether to continue retrieval or stop and synthesize the answer.
+
+Question: {question}
+Question Complexity: {complexity}
+Current Iteration: {iteration}
+Max Iterations: {max_iterations}
+Recent Quality Improvements: {recent_improvements}
+
+Previous Assessment:
+- Quality Score: {previous_quality}
+- Coverage Score: {previous_coverage}
+- Key Findings So Far:
+{key_findings}
+- Open Information Gaps:
+{information_gaps}
+
+Total Evidence Count: {evidence_count}
+Context ({context_scope}):
+{context}
+
+Scores must describe ALL evidence gathered so far, not only the context shown above when it is limited to this hop.
+
+Provide your response in JSON format:
+{{
+    "quality_score": <float 0-1>,
+    "coverage_score": <float 0-1>,
+    "evidence_strength": <float 0-1>,
+    "information_gaps": ["<gap1>", "<gap2>"],
+    "contradictions": ["<contradiction1>"],
+    "sufficiency_assessment": "<insufficient|partial|sufficient|comprehensive>",
+    "key_findings": ["<finding1>", "<finding2>"],
+    "decision": "<continue|stop>",
+    "confidence": <float 0-1>,
+    "stop_reasons": ["<reason1>"],
+    "continue_strategy": "<if continuing, what to focus on>",
+    "estimated_remaining_hops": <int>,
+    "reasoning": "<brief explanation of the assessment and decision>"
+}}
+
+Scoring guidelines:
+- quality_score: Relevance and accuracy of information (0=irrelevant, 1=highly relevant)
+- coverage_score: How well the evidence covers question aspects (0=no coverage, 1=complete coverage)
+- evidence_strength: Reliability and authority of sources (0=weak, 1=strong)
+
+Stop if:
+- Quality score > 0.85 AND coverage > 0.9
+- Quality improvement < 0.05 for last 2 hops
+- No new relevant information in last 2 hops
+- Reached complexity-based maximum iterations
+
+Continue if:
+- Significant information gaps remain
+- Quality/coverage scores below thresholds
+- Recent retrievals were successful
+"""
+
 # Intelligent Decision Making Prompt
 DECISION_MAKING_PROMPT = """You are an expert decision maker for RAG systems. Decide whether to continue retrieval or stop and synthesize the answer.
 
@@ -0,0 +1,118 @@
+"""Typed structured-output schemas for the JSON prompts in `multi_hops_prompts.py`.
+
+Each model mirrors the JSON format its prompt asks for; the pipeline binds them
+with `with_structured_output` so responses are parsed and validated by the
+model API instead of being cut out of free text.
+"""
+
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
+
+
+class QuestionAnalysis(BaseModel):
+    """QUESTION_ANALYSIS_PROMPT"""
+
+    complexity_score: float = Field(description="1-10")
+    question_type: Literal["factual", "analytical", "comparative", "multi_domain", "complex_reasoning"]
+    estimated_hops: int = Field(description="2-10")
+    required_evidence_types: List[str]
+    key_aspects: List[str]
+    reasoning: str
+
+
+class SubQuestion(BaseModel):
+    query: str
+    priority: float = Field(description="0-1, 1.0 = highest priority")
+    aspect: str
+    strategy: Literal["semantic", "keyword", "hybrid"]
+
+
+class QueryPlan(BaseModel):
+    """MULTI_QUERY_PLANNING_PROMPT"""
+
+    sub_questions: List[SubQuestion]
+    reasoning: str
+
+
+Sufficiency = Literal["insufficient", "partial", "sufficient", "comprehensive"]
+
+
+class ContextAssessment(BaseModel):
+    """CONTEXT_ASSESSMENT_PROMPT"""
+
+    quality_score: float = Field(description="0-1")
+    coverage_score: float = Field(description="0-1")
+    evidence_strength: float = Field(description="0-1")
+    information_gaps: List[str]
+    contradictions: List[str]
+    sufficiency_assessment: Sufficiency
+    key_findings: List[str]
+    reasoning: str
+
+
+class IncrementalAssessment(BaseModel):
+    """INCREMENTAL_ASSESSMENT_PROMPT"""
+
+    quality_score: float = Field(description="0-1, for all evidence gathered so far")
+    coverage_score: float = Field(description="0-1, for all evidence gathered so far")
+    evidence_strength: float = Field(description="0-1, for all evidence gathered so far")
+    information_gaps: List[str]
+    contradictions: List[str]
+    sufficiency_assessment: Sufficiency
+    new_findings: List[str]
+    reasoning: str
+
+
+class Decision(BaseModel):
+    """DECISION_MAKING_PROMPT"""
+
+    decision: Literal["continue", "stop"]
+    confidence: float = Field(description="0-1")
+    reasoning: str
+    stop_reasons: List[str]
+    continue_strategy: str
+    estimated_remaining_hops: int
+
+
+class AssessAndDecide(BaseModel):
+    """ASSESS_AND_DECIDE_PROMPT"""
+
+    quality_score: float = Field(description="0-1, for all evidence gathered so far")
+    coverage_score: float = Field(description="0-1, for all evidence gathered so far")
+    evidence_strength: float = Field(description="0-1, for all evidence gathered so far")
+    information_gaps: List[str]
+    contradictions: List[str]
+    sufficiency_assessment: Sufficiency
+    key_findings: List[str]
+    decision: Literal["continue", "stop"]
+    confidence: float = Field(description="0-1")
+    stop_reasons: List[str]
+    continue_strategy: str
+    estimated_remaining_hops: int
+    reasoning: str
+
+
+class Verification(BaseModel):
+    """ADVANCED_VERIFICATION_PROMPT"""
+
+    overall_grounding: Literal["pass", "fail"]
+    factual_grounding: float = Field(description="0-1")
+    logical_consistency: float = Field(description="0-1")
+    completeness: float = Field(description="0-1")
+    source_attribution: float = Field(description="0-1")
+    confidence_calibration: float = Field(description="0-1")
+    issues_found: List[str]
+    recommendations: List[str]
+    final_assessment: Literal["excellent", "good", "acceptable", "needs_improvement", "poor"]
+
+
+# Output token cap per node: what the schema needs, not the 4096 default
+NODE_MAX_TOKENS = {
+    "analyze": 512,
+    "plan": 1024,
+    "assess": 1024,
+    "decide": 512,
+    "assess_and_decide": 1536,
+    "verify": 768,
+}
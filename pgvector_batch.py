@@ -0,0 +1,140 @@
+"""Multi-query vector search against a langchain_postgres PGVector collection.
+
+`PGVectorSearch` sends every query vector of a hop in one SQL statement: the
+vectors are unnested into a row set and a LATERAL subquery takes each one's
+nearest neighbours, so a hop costs one round-trip instead of one per
+(query, retriever) call. Similarity and MMR are then cut from the same
+candidates locally (`mmap_vector_store.mmr`).
+
+When ingestion has built an ANN index (`pgvector_index`), the subquery orders
+by the indexed expression and each statement sets `hnsw.ef_search` /
+`ivfflat.probes` for the question's complexity. Distances stay full precision:
+with a quantized or shortened index, the first pass takes `first_pass_k`
+candidates and they are re-ranked by exact distance in the same statement.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import weakref
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from psycopg_pool import AsyncConnectionPool
+
+from mmap_vector_store import Candidates
+from pgvector_index import DISTANCE_OPS, ann_settings, first_pass_k, index_order
+
+_SEARCH_SQL = """
+WITH q AS (
+    SELECT ord, vec::vector AS vec
+    FROM unnest(%(vectors)s::text[]) WITH ORDINALITY AS t(vec, ord)
+)
+SELECT q.ord, hit.id, hit.document, hit.cmetadata, hit.distance, hit.embedding
+FROM q
+CROSS JOIN LATERAL (
+    SELECT * FROM (
+        SELECT e.id, e.document, e.cmetadata,
+               e.embedding {op} q.vec AS distance,
+               CASE WHEN %(with_embeddings)s THEN e.embedding::text END AS embedding
+        FROM langchain_pg_embedding e
+        WHERE e.collection_id = '{collection_id}'
+        ORDER BY {order}
+        LIMIT %(candidates)s
+    ) first_pass
+    ORDER BY first_pass.distance
+    LIMIT %(k)s
+) hit
+ORDER BY q.ord, hit.distance
+"""
+
+_COLLECTION_SQL = "SELECT uuid, cmetadata FROM langchain_pg_collection WHERE name = %s"
+_SET_CONFIG_SQL = "SELECT set_config(%s, %s, true)"
+
+
+def _conninfo(url: str) -> str:
+    # SQLAlchemy-style URLs ("postgresql+psycopg://") -> libpq
+    return url.replace("+psycopg", "", 1)
+
+
+def _vector_literal(vector: List[float]) -> str:
+    return "[" + ",".join(map(str, vector)) + "]"
+
+
+class PGVectorSearch:
+    """Batched top-k over one collection, through a small psycopg pool per event loop."""
+
+    def __init__(self, connection: str, collection_name: str, distance: str = "cosine", pool_size: int = 4):
+        self.conninfo = _conninfo(connection)
+        self.collection_name = collection_name
+        self.distance = distance
+        self.pool_size = pool_size
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncConnectionPool]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.sql: Optional[str] = None
+        self.index: Optional[Dict[str, Any]] = None
+
+    def _prepare(self, row):
+        """Build the statement from the collection row (uuid, cmetadata)."""
+        if row is None:
+            raise ValueError(f"PGVector collection {self.collection_name!r} does not exist")
+        collection_id, metadata = row
+        self.index = (metadata or {}).get("ann_index")
+        op = DISTANCE_OPS[self.distance]
+        if self.index and self.index["distance"] == self.distance:
+            # the indexed expression, with the collection as a literal so the partial index matches
+            order = index_order(self.index, self.distance, "e.embedding", "q.vec")
+        else:
+            self.index = None
+            order = f"e.embedding {op} q.vec"
+        self.sql = _SEARCH_SQL.format(op=op, order=order, collection_id=collection_id)
+
+    def _params(self, vectors: List[List[float]], k: int, with_embeddings: bool) -> Dict[str, Any]:
+        return {
+            "vectors": [_vector_literal(v) for v in vectors],
+            "k": k,
+            "candidates": first_pass_k(self.index, k),
+            "with_embeddings": with_embeddings,
+        }
+
+    def _settings(self, k: int, complexity: Optional[float]) -> Dict[str, str]:
+        return ann_settings(self.index, complexity, candidates=first_pass_k(self.index, k))
+
+    @staticmethod
+    def _group(rows, n_queries: int) -> List[Candidates]:
+        out: List[Candidates] = [[] for _ in range(n_queries)]
+        for ord_, id_, text, metadata, distance, embedding in rows:
+            doc = Document(id=str(id_), page_content=text or "", metadata=metadata or {})
+            vector = np.asarray(json.loads(embedding), dtype=np.float32) if embedding else None
+            out[ord_ - 1].append((doc, float(distance), vector))
+        return out
+
+    async def _pool(self) -> AsyncConnectionPool:
+        # opened on first use in each event loop; its connections cannot cross loops
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = AsyncConnectionPool(
+                self.conninfo, min_size=1, max_size=self.pool_size, open=False
+            )
+            await pool.open()
+        return pool
+
+    async def asearch(
+        self, vectors: List[List[float]], k: int, with_embeddings: bool = False, complexity: Optional[float] = None
+    ) -> List[Candidates]:
+        """Top-`k` candidates per query vector, in one statement (one transaction)."""
+        if not vectors:
+            return []
+        async with (await self._pool()).connection() as conn:
+            if self.sql is None:
+                cursor = await conn.execute(_COLLECTION_SQL, (self.collection_name,))
+                self._prepare(await cursor.fetchone())
+            for name, value in self._settings(k, complexity).items():
+                await conn.execute(_SET_CONFIG_SQL, (name, value))
+            cursor = await conn.execute(self.sql, self._params(vectors, k, with_embeddings))
+            rows = await cursor.fetchall()
+        return self._group(rows, len(vectors))
@@ -0,0 +1,390 @@
+"""ANN index provisioning and tuning for a PGVector collection.
+
+langchain_postgres stores every collection in one `langchain_pg_embedding`
+table with an untyped `embedding` column, so nothing is indexed and each
+search is an exact scan. `ensure_index` builds an HNSW or IVFFlat index on
+`embedding::vector(dims)`, or `embedding::halfvec(dims)` above pgvector's
+2000-dimension limit (text-embedding-3-large is 3072), as a partial index per
+collection. The settings are recorded in the collection's `cmetadata` under
+"ann_index"; `pgvector_batch.PGVectorSearch` reads them to order by the
+indexed expression and to set `hnsw.ef_search` / `ivfflat.probes` per query
+from the question's complexity (`ann_settings`).
+
+The first pass can run on a smaller representation than the stored vectors:
+halfvec, binary quantization (`binary_quantize`, Hamming distance) and/or a
+prefix of the first N dimensions (text-embedding-3 vectors are trained so that
+a prefix is itself a usable embedding). Full-precision vectors stay in the
+table, and the `first_pass_k` candidates of a lossy first pass are re-ranked
+by exact distance.
+
+    PGVECTOR_INDEX=                      # hnsw | ivfflat | "" (default: no index)
+    PGVECTOR_HNSW_M=16
+    PGVECTOR_HNSW_EF_CONSTRUCTION=64
+    PGVECTOR_IVFFLAT_LISTS=              # default: rows / 1000, sqrt(rows) above 1M rows
+    PGVECTOR_INDEX_QUANTIZATION=auto     # auto (vector, halfvec above 2000 dims) | halfvec | binary
+    PGVECTOR_INDEX_DIMS=                 # index only the first N dimensions
+    PGVECTOR_RERANK_FACTOR=4             # first-pass candidates per result when re-ranking
+
+The index is opt-in: only `PGVectorSearch` (`batch_search=True`) orders by the
+indexed expression, so the default per-call search path would not use it; a
+pipeline built with `batch_search=False` warns when the collection has one.
+`python pgvector_index.py build` creates or refreshes the index of
+COLLECTION_NAME; `python pgvector_index.py report` prints recall@k and
+latency of each ef_search / probes setting against exact search.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import psycopg
+from psycopg import sql
+
+# pgvector indexes `vector` up to 2000 dimensions, `halfvec` up to 4000 and `bit` up to 64000
+MAX_VECTOR_INDEX_DIMS = 2000
+_OPCLASS = {"cosine": "cosine", "euclidean": "l2", "inner": "ip"}
+# Operators of langchain_postgres' DistanceStrategy values
+DISTANCE_OPS = {"cosine": "<=>", "euclidean": "<->", "inner": "<#>"}
+# ef_search / probes range swept by complexity 1..10 (geometric for ef_search)
+HNSW_EF_SEARCH = (40, 320)
+IVFFLAT_PROBE_FACTOR = (0.5, 2.0)  # x sqrt(lists)
+# IVFFlat centroids go stale as rows are added; rebuild past this growth
+IVFFLAT_REBUILD_GROWTH = 2.0
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    method: str = "hnsw"
+    m: int = 16
+    ef_construction: int = 64
+    lists: Optional[int] = None
+    distance: str = "cosine"
+    quantization: str = "auto"  # auto | halfvec | binary
+    dims: Optional[int] = None  # first-N-dimension prefix (None: all)
+    rerank_factor: int = 4
+
+
+def _conninfo(url: str) -> str:
+    return url.replace("+psycopg", "", 1)
+
+
+def index_name(collection: str) -> str:
+    # stays under the 63-byte identifier limit for any collection name
+    return f"ix_ann_{hashlib.sha1(collection.encode('utf-8')).hexdigest()[:16]}"
+
+
+def index_expression(info: Dict[str, Any], column: str = "embedding") -> str:
+    """The indexed expression applied to `column`, e.g. "(embedding)::halfvec(3072)".
+
+    Also used on the query vector, so both sides get the same reduction.
+    """
+    dims = info["dims"]
+    base = column if dims == info.get("source_dims", dims) else f"subvector({column}, 1, {dims})"
+    if info["type"] == "bit":
+        return f"binary_quantize(({base})::vector({dims}))::bit({dims})"
+    return f"({base})::{info['type']}({dims})"
+
+
+def index_order(info: Dict[str, Any], distance: str, column: str, query: str) -> str:
+    """ORDER BY expression that the index serves."""
+    op = "<~>" if info["type"] == "bit" else DISTANCE_OPS[distance]
+    return f"{index_expression(info, column)} {op} {index_expression(info, query)}"
+
+
+def first_pass_k(info: Optional[Dict[str, Any]], k: int) -> int:
+    """Candidates to take from the index for `k` results (more when they are re-ranked)."""
+    return k * info.get("rerank_factor", 1) if info and info.get("rerank") else k
+
+
+def ivfflat_lists(rows: int) -> int:
+    return max(1, rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows)))
+
+
+def _collection(conn, collection: str):
+    row = conn.execute(
+        "SELECT uuid, cmetadata FROM langchain_pg_collection WHERE name = %s", (collection,)
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"PGVector collection {collection!r} does not exist")
+    return row[0], dict(row[1] or {})
+
+
+def _save_info(conn, collection_id, metadata: Dict[str, Any], info: Optional[Dict[str, Any]]):
+    metadata = {k: v for k, v in metadata.items() if k != "ann_index"}
+    if info is not None:
+        metadata["ann_index"] = info
+    # untyped parameter: the server casts it to the column's json/jsonb type
+    conn.execute(
+        "UPDATE langchain_pg_collection SET cmetadata = %s WHERE uuid = %s", (json.dumps(metadata), collection_id)
+    )
+
+
+def ensure_index(connection: str, collection: str, spec: IndexSpec) -> Optional[Dict[str, Any]]:
+    """Create, rebuild or keep `collection`'s ANN index; returns the recorded settings."""
+    with psycopg.connect(_conninfo(connection), autocommit=True) as conn:
+        collection_id, metadata = _collection(conn, collection)
+        current = metadata.get("ann_index")
+        rows, dims = conn.execute(
+            "SELECT count(*), max(vector_dims(embedding)) FROM langchain_pg_embedding WHERE collection_id = %s",
+            (collection_id,),
+        ).fetchone()
+        if not rows:
+            return current
+
+        source_dims = dims
+        dims = min(spec.dims or dims, dims)
+        if spec.quantization == "binary":
+            vtype = "bit"
+        elif spec.quantization == "halfvec" or dims > MAX_VECTOR_INDEX_DIMS:
+            vtype = "halfvec"
+        else:
+            vtype = "vector"
+        if spec.method == "hnsw":
+            params = {"m": spec.m, "ef_construction": spec.ef_construction}
+        elif spec.method == "ivfflat":
+            params = {"lists": spec.lists or ivfflat_lists(rows)}
+        else:
+            raise ValueError(f"Unknown index method: {spec.method!r}")
+        info = {
+            "index": index_name(collection),
+            "method": spec.method,
+            "type": vtype,
+            "dims": dims,
+            "source_dims": source_dims,
+            "distance": spec.distance,
+            "params": params,
+            "built_rows": rows,
+            # a lossy first pass is re-ranked by exact distance
+            "rerank": vtype != "vector" or dims < source_dims,
+            "rerank_factor": spec.rerank_factor,
+        }
+
+        same_layout = current is not None and all(
+            current.get(key) == info[key] for key in ("method", "type", "dims", "source_dims", "distance")
+        )
+        if same_layout and current.get("rerank_factor") != spec.rerank_factor:
+            # query-time setting only; no rebuild
+            current = {**current, "rerank": info["rerank"], "rerank_factor": spec.rerank_factor}
+            _save_info(conn, collection_id, metadata, current)
+        if same_layout and spec.method == "hnsw" and current["params"] == params:
+            return current  # HNSW absorbs inserts; nothing to do
+        if same_layout and spec.method == "ivfflat" and (
+            spec.lists is None or current["params"] == params
+        ) and rows < current["built_rows"] * IVFFLAT_REBUILD_GROWTH:
+            return current
+
+        started = time.perf_counter()
+        name = sql.Identifier(info["index"])
+        conn.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(name))
+        conn.execute(
+            sql.SQL(
+                "CREATE INDEX CONCURRENTLY {name} ON langchain_pg_embedding USING {method} "
+                "(({expr}) {opclass}) WITH ({params}) WHERE collection_id = {collection_id}"
+            ).format(
+                name=name,
+                method=sql.SQL(spec.method),
+                expr=sql.SQL(index_expression(info)),
+                opclass=sql.SQL("bit_hamming_ops" if vtype == "bit" else f"{vtype}_{_OPCLASS[spec.distance]}_ops"),
+                params=sql.SQL(", ").join(sql.SQL(f"{k} = {int(v)}") for k, v in params.items()),
+                collection_id=sql.Literal(str(collection_id)),
+            )
+        )
+        info["build_seconds"] = round(time.perf_counter() - started, 2)
+        _save_info(conn, collection_id, metadata, info)
+        return info
+
+
+def index_spec_from_env() -> Optional[IndexSpec]:
+    """IndexSpec from PGVECTOR_INDEX (hnsw | ivfflat; unset or empty: no index)."""
+    method = os.getenv("PGVECTOR_INDEX", "")
+    if not method:
+        return None
+    lists = os.getenv("PGVECTOR_IVFFLAT_LISTS")
+    dims = os.getenv("PGVECTOR_INDEX_DIMS")
+    return IndexSpec(
+        method=method,
+        m=int(os.getenv("PGVECTOR_HNSW_M", "16")),
+        ef_construction=int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")),
+        lists=int(lists) if lists else None,
+        quantization=os.getenv("PGVECTOR_INDEX_QUANTIZATION", "auto"),
+        dims=int(dims) if dims else None,
+        rerank_factor=int(os.getenv("PGVECTOR_RERANK_FACTOR", "4")),
+    )
+
+
+def ensure_index_from_env(connection: str, collection: str) -> Optional[Dict[str, Any]]:
+    spec = index_spec_from_env()
+    return ensure_index(connection, collection, spec) if spec is not None else None
+
+
+def recorded_index(connection: str, collection: str) -> Optional[Dict[str, Any]]:
+    """Settings of `collection`'s ANN index as recorded by `ensure_index` (None: no index)."""
+    with psycopg.connect(_conninfo(connection), autocommit=True) as conn:
+        row = conn.execute(
+            "SELECT cmetadata FROM langchain_pg_collection WHERE name = %s", (collection,)
+        ).fetchone()
+    return (row[0] or {}).get("ann_index") if row else None
+
+
+def ann_settings(
+    info: Optional[Dict[str, Any]], complexity: Optional[float] = None, candidates: int = 0
+) -> Dict[str, str]:
+    """Per-query GUCs: wider search for more complex questions (complexity 1-10).
+
+    HNSW returns at most ef_search rows, so it never drops below `candidates`.
+    """
+    if not info:
+        return {}
+    t = (min(max(complexity if complexity is not None else 5.0, 1.0), 10.0) - 1.0) / 9.0
+    if info["method"] == "hnsw":
+        lo, hi = HNSW_EF_SEARCH
+        return {"hnsw.ef_search": str(max(round(lo * (hi / lo) ** t), candidates))}
+    lists = info["params"]["lists"]
+    lo, hi = IVFFLAT_PROBE_FACTOR
+    probes = round(math.sqrt(lists) * (lo + (hi - lo) * t))
+    return {"ivfflat.probes": str(min(max(probes, 1), lists))}
+
+
+# ------------------------------ recall report ------------------------------
+
+
+def _timed_top_k(conn, query: str, params: Dict[str, Any], gucs: Dict[str, str]):
+    with conn.transaction():
+        for name, value in gucs.items():
+            conn.execute("SELECT set_config(%s, %s, true)", (name, value))
+        started = time.perf_counter()
+        ids = [row[0] for row in conn.execute(query, params).fetchall()]
+    return ids, (time.perf_counter() - started) * 1000
+
+
+def recall_report(connection: str, collection: str, samples: int = 50, k: int = 10) -> List[Dict[str, Any]]:
+    """Recall@k and latency of each ef_search / probes setting versus exact search.
+
+    Query vectors are sampled from the collection itself, so every query has
+    at least one exact neighbour; recall is measured over the full top-k.
+    For a lossy first pass, "first_pass_recall" is the recall of its own top-k
+    and "recall" the recall after exact re-ranking of `first_pass_k` candidates.
+    """
+    # autocommit: each timed search runs in its own transaction, so SET LOCAL never leaks
+    with psycopg.connect(_conninfo(connection), autocommit=True) as conn:
+        collection_id, metadata = _collection(conn, collection)
+        info = metadata.get("ann_index")
+        if info is None:
+            raise ValueError(f"Collection {collection!r} has no ANN index; run `python pgvector_index.py build`")
+        op = DISTANCE_OPS[info["distance"]]
+        queries = [
+            row[0] for row in conn.execute(
+                "SELECT embedding::text FROM langchain_pg_embedding WHERE collection_id = %s "
+                "ORDER BY random() LIMIT %s",
+                (collection_id, samples),
+            ).fetchall()
+        ]
+        where = f"collection_id = '{collection_id}'"
+        exact_sql = (
+            f"SELECT id FROM langchain_pg_embedding WHERE {where} "
+            f"ORDER BY embedding {op} %(q)s::vector LIMIT %(k)s"
+        )
+        first_pass_sql = (
+            f"SELECT id, embedding {op} %(q)s::vector AS distance FROM langchain_pg_embedding WHERE {where} "
+            f"ORDER BY {index_order(info, info['distance'], 'embedding', '%(q)s::vector')} LIMIT %(n)s"
+        )
+        ann_sql = f"SELECT id FROM ({first_pass_sql}) c ORDER BY c.distance LIMIT %(k)s"
+        n = first_pass_k(info, k)
+
+        exact, exact_ms = {}, []
+        for q in queries:
+            exact[q], ms = _timed_top_k(conn, exact_sql, {"q": q, "k": k}, {"enable_indexscan": "off"})
+            exact_ms.append(ms)
+        report = [{"setting": "exact", "recall": 1.0, "first_pass_recall": 1.0, **_latency(exact_ms)}]
+
+        if info["method"] == "hnsw":
+            sweep = [("hnsw.ef_search", v) for v in (k, 20, 40, 80, 160, 320) if v >= k]
+        else:
+            lists = info["params"]["lists"]
+            sweep = [("ivfflat.probes", v) for v in (1, 2, 4, 8, 16, 32, 64) if v <= lists]
+
+        def recall(ids, q):
+            return len(set(ids) & set(exact[q])) / max(len(exact[q]), 1)
+
+        for name, value in sweep:
+            recalls, raw_recalls, timings = [], [], []
+            for q in queries:
+                gucs = {name: str(max(value, n)) if name == "hnsw.ef_search" else str(value)}
+                ids, ms = _timed_top_k(conn, ann_sql, {"q": q, "k": k, "n": n}, gucs)
+                raw_ids, _ = _timed_top_k(conn, first_pass_sql, {"q": q, "n": k}, gucs)
+                recalls.append(recall(ids, q))
+                raw_recalls.append(recall(raw_ids, q))
+                timings.append(ms)
+            report.append({
+                "setting": f"{name}={value}",
+                "recall": statistics.mean(recalls),
+                "first_pass_recall": statistics.mean(raw_recalls),
+                **_latency(timings),
+            })
+        return report
+
+
+def index_summary(connection: str, collection: str) -> Dict[str, Any]:
+    """Recorded index settings plus current index and table sizes."""
+    with psycopg.connect(_conninfo(connection), autocommit=True) as conn:
+        _, metadata = _collection(conn, collection)
+        info = dict(metadata.get("ann_index") or {})
+        if info:
+            info["index_bytes"] = conn.execute(
+                "SELECT pg_relation_size(to_regclass(%s))", (info["index"],)
+            ).fetchone()[0]
+        info["table_bytes"] = conn.execute(
+            "SELECT pg_total_relation_size('langchain_pg_embedding'::regclass)"
+        ).fetchone()[0]
+        return info
+
+
+def _latency(timings: List[float]) -> Dict[str, float]:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(timings[len(timings) // 2], 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+    }
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    connection = os.environ["PGVECTOR_DATABASE_URL"]
+    collection = os.environ["COLLECTION_NAME"]
+    command = sys.argv[1] if len(sys.argv) > 1 else "report"
+    if command == "build":
+        if index_spec_from_env() is None:
+            raise SystemExit("Set PGVECTOR_INDEX=hnsw or ivfflat to build an ANN index")
+        print(json.dumps(ensure_index_from_env(connection, collection), indent=2))
+    elif command == "report":
+        samples = int(os.getenv("ANN_REPORT_SAMPLES", "50"))
+        k = int(os.getenv("ANN_REPORT_K", "24"))
+        summary = index_summary(connection, collection)
+        print(
+            f"Index: {summary.get('method')} on {summary.get('type')}({summary.get('dims')}) of "
+            f"{summary.get('source_dims', summary.get('dims'))} dims, {summary.get('index_bytes', 0) / 2**20:.1f} MiB "
+            f"(built in {summary.get('build_seconds', '?')}s); table {summary['table_bytes'] / 2**20:.1f} MiB; "
+            f"re-rank x{summary.get('rerank_factor', 1) if summary.get('rerank') else 'off'}"
+        )
+        print(f"{'setting':<24}{'recall@' + str(k):>10}{'1st pass':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for row in recall_report(connection, collection, samples=samples, k=k):
+            print(
+                f"{row['setting']:<24}{row['recall']:>10.3f}{row['first_pass_recall']:>10.3f}"
+                f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+            )
+    else:
+        raise SystemExit("usage: python pgvector_index.py [build|report]")
+
+
+if __name__ == "__main__":
+    main()
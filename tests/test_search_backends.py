@@ -0,0 +1,108 @@
+"""`EnhancedRAGPipeline._search` on the backends without native async search."""
+
+import asyncio
+import weakref
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import VectorStore
+
+from mmap_vector_store import MmapVectorStore, MmapVectorWriter
+from multi_hops_agentic_rag import EnhancedRAGPipeline
+
+TEXTS = ["letters of credit", "bills of lading", "documentary collections", "standby guarantees"]
+RETRIEVERS = {
+    "semantic": {"search_type": "mmr", "search_kwargs": {"k": 2, "fetch_k": 4, "lambda_mult": 0.5}},
+    "similarity": {"search_type": "similarity", "search_kwargs": {"k": 2}},
+}
+
+
+class SyncOnlyStore(VectorStore):
+    """Stand-in for Neo4jVector: sync scored search, query-only MMR, no async overrides."""
+
+    def __init__(self, embedding):
+        self.embedding = embedding
+        self.docs = [Document(page_content=t) for t in TEXTS]
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return [(d, 0.1 * i) for i, d in enumerate(self.docs[:k])]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.docs[:k]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.docs[:k]
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
+
+    def add_texts(self, texts, metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        raise NotImplementedError
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+
+def _pipeline(backend: str, store, embeddings) -> EnhancedRAGPipeline:
+    # only the attributes `_search` reads; no Azure clients or database
+    pipeline = object.__new__(EnhancedRAGPipeline)
+    pipeline.backend = backend
+    pipeline.vectorstore = store
+    pipeline._async_vectorstores = weakref.WeakKeyDictionary()
+    pipeline.embeddings = embeddings
+    pipeline.retriever_configs = RETRIEVERS
+    return pipeline
+
+
+def _mmap_store(tmp_path, embeddings) -> MmapVectorStore:
+    writer = MmapVectorWriter("test", root=str(tmp_path))
+    writer.add(Document(page_content=t, metadata={"chunk_id": f"c{i}"}) for i, t in enumerate(TEXTS))
+    writer.commit(embeddings)
+    return MmapVectorStore.load("test", embeddings, root=str(tmp_path))
+
+
+def _search_all(pipeline: EnhancedRAGPipeline):
+    async def run():
+        return {part: await pipeline._search(part, "letters of credit") for part in RETRIEVERS}
+
+    return asyncio.run(run())
+
+
+def test_sync_only_store_serves_similarity_and_mmr():
+    embeddings = DeterministicFakeEmbedding(size=8)
+    hits = _search_all(_pipeline("neo4j", SyncOnlyStore(embeddings), embeddings))
+
+    assert [d.page_content for d, _ in hits["similarity"]] == TEXTS[:2]
+    assert all(score is not None for _, score in hits["similarity"])
+    assert [d.page_content for d, _ in hits["semantic"]] == TEXTS[:2]
+
+
+def test_mmap_store_serves_similarity_and_mmr(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=8)
+    hits = _search_all(_pipeline("mmap", _mmap_store(tmp_path, embeddings), embeddings))
+
+    assert len(hits["similarity"]) == 2
+    # the query text is stored verbatim, so it is its own nearest neighbour
+    assert hits["similarity"][0][0].page_content == "letters of credit"
+    assert hits["similarity"][0][1] > hits["similarity"][1][1]
+    assert len(hits["semantic"]) == 2
+
+
+def test_mmap_store_async_search_matches_sync(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=8)
+    store = _mmap_store(tmp_path, embeddings)
+    vector = embeddings.embed_query("bills of lading")
+
+    async def run():
+        return (
+            await store.asimilarity_search_with_score_by_vector(vector, k=3),
+            await store.amax_marginal_relevance_search_by_vector(vector, k=2, fetch_k=4),
+        )
+
+    hits, diverse = asyncio.run(run())
+    assert hits == store.similarity_search_with_score_by_vector(vector, k=3)
+    assert diverse == store.max_marginal_relevance_search_by_vector(vector, k=2, fetch_k=4)
@@ -0,0 +1,57 @@
+"""Atomic rebuilds of the on-disk indexes (BM25, memory-mapped vectors).
+
+An index is a set of files that must be read together. Each rebuild writes a
+complete new generation directory, then swaps the one-line `CURRENT` pointer
+with `os.replace`:
+
+    <root>/<collection>/CURRENT          "gen-<time>-<id>"
+    <root>/<collection>/gen-<time>-<id>/ meta.json, *.npy, docs.jsonl, ...
+
+A reader resolves `CURRENT` once and opens every file from that generation,
+so it never mixes files of two rebuilds. The previous generation is kept for
+readers that are still open on it; older ones are removed.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Optional
+from uuid import uuid4
+
+POINTER = "CURRENT"
+KEEP_GENERATIONS = 2
+
+
+def current_dir(path: Optional[Path]) -> Optional[Path]:
+    """Generation directory `path/CURRENT` points to (the flat pre-generation layout if no pointer)."""
+    if path is None:
+        return None
+    pointer = path / POINTER
+    if pointer.exists():
+        return path / pointer.read_text(encoding="utf-8").strip()
+    return path if (path / "meta.json").exists() else None
+
+
+def publish(path: Path, fill: Callable[[Path], None], keep: int = KEEP_GENERATIONS) -> Path:
+    """Write a new generation with `fill(directory)` and make it current; returns its directory."""
+    path.mkdir(parents=True, exist_ok=True)
+    name = f"gen-{time.time_ns()}-{uuid4().hex[:8]}"
+    generation = path / name
+    generation.mkdir()
+    try:
+        fill(generation)
+    except BaseException:
+        shutil.rmtree(generation, ignore_errors=True)
+        raise
+
+    tmp = path / f"{POINTER}.{name}.tmp"
+    tmp.write_text(name, encoding="utf-8")
+    os.replace(tmp, path / POINTER)
+
+    # names sort by creation time; keep the newest `keep` (open readers may still use them)
+    for old in sorted(p for p in path.iterdir() if p.is_dir() and p.name.startswith("gen-"))[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    return generation